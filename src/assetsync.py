@@ -0,0 +1,113 @@
+import fnmatch
+import os
+import shutil
+
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_IGNORE = ["*:Zone.Identifier", ".DS_Store", "Thumbs.db", "desktop.ini"]
+LINK_METHODS = ("copy", "hardlink", "reflink")
+
+# ioctl request that asks Linux copy-on-write filesystems (btrfs, xfs) to share extents
+FICLONE = 0x40049409
+
+
+def is_ignored(relative_path, ignore):
+    name = os.path.basename(relative_path)
+    relative_path = relative_path.replace(os.sep, "/")
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern) for pattern in ignore)
+
+
+def find_assets(source, ignore=DEFAULT_IGNORE):
+    assets = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        relative_dir = os.path.relpath(dirpath, source)
+        dirnames[:] = sorted(d for d in dirnames if not is_ignored(os.path.normpath(os.path.join(relative_dir, d)), ignore))
+        for filename in sorted(filenames):
+            relative_path = os.path.normpath(os.path.join(relative_dir, filename))
+            if not is_ignored(relative_path, ignore):
+                assets.append(relative_path)
+    return assets
+
+
+def _reflink(source_path, dest_path):
+    if fcntl is None:
+        return False
+    with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            return False
+    shutil.copystat(source_path, dest_path)
+    return True
+
+
+def transfer_file(source_path, dest_path, method="copy"):
+    # returns the method that was actually used; copy2 uses os.sendfile where the platform has it
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if method == "hardlink":
+        try:
+            os.link(source_path, dest_path)
+            return "hardlink"
+        except OSError:
+            pass
+    elif method == "reflink":
+        if _reflink(source_path, dest_path):
+            return "reflink"
+    shutil.copy2(source_path, dest_path)
+    return "copy"
+
+
+def _is_unchanged(source_path, dest_path, source_stat, checksum):
+    try:
+        dest_stat = os.stat(dest_path)
+    except OSError:
+        return False
+    if dest_stat.st_size != source_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(source_path) == hash_file(dest_path)
+    return dest_stat.st_mtime_ns == source_stat.st_mtime_ns
+
+
+def sync_static(source, destination, previous_assets=(), ignore=DEFAULT_IGNORE, checksum=False, method="copy"):
+    # copies new or changed files from source into destination and removes files that an
+    # earlier sync copied but that no longer exist in source; returns (synced assets, counts)
+    if method not in LINK_METHODS:
+        raise ValueError(f"unknown link method: {method}")
+    counts = {"copy": 0, "hardlink": 0, "reflink": 0, "unchanged": 0, "removed": 0}
+    assets = find_assets(source, ignore) if os.path.isdir(source) else []
+    created_dirs = set()
+    for relative_path in assets:
+        source_path = os.path.join(source, relative_path)
+        dest_path = os.path.join(destination, relative_path)
+        if _is_unchanged(source_path, dest_path, os.stat(source_path), checksum):
+            counts["unchanged"] += 1
+            continue
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir not in created_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            created_dirs.add(dest_dir)
+        counts[transfer_file(source_path, dest_path, method)] += 1
+    current = set(assets)
+    for relative_path in previous_assets:
+        if relative_path not in current:
+            remove_output(destination, relative_path)
+            counts["removed"] += 1
+    return assets, counts
+
+
+def remove_output(destination, relative_path):
+    dest_path = os.path.join(destination, relative_path)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    # prune directories left empty by the removal, but never the output root
+    directory = os.path.dirname(dest_path)
+    while os.path.abspath(directory) != os.path.abspath(destination) and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
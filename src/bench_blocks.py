@@ -0,0 +1,57 @@
+import sys
+import timeit
+
+from blocks import BlockType, block_to_block_type
+from functions import block_to_html_node
+
+def legacy_block_to_block_type(block):
+    # block_to_block_type as it was before classify_block, kept as the baseline
+    lines = block.split("\n")
+    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        return BlockType.HEADING
+    if block.startswith("```"):
+        return BlockType.CODE
+    if block.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+    if block.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
+        return BlockType.UNORDERED_LIST
+    if block.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
+            i += 1
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+def make_blocks(items):
+    code = "```\n" + "\n".join(f"line {i}" for i in range(items)) + "\n```"
+    return {
+        "ordered_list": "\n".join(f"{i}. item number {i}" for i in range(1, items + 1)),
+        "unordered_list": "\n".join(f"- item number {i}" for i in range(items)),
+        "quote": "\n".join(f"> quoted line {i}" for i in range(items)),
+        "code": code,
+        "heading": "## A heading",
+    }
+
+def bench(items, number):
+    for name, block in make_blocks(items).items():
+        assert block_to_block_type(block) == legacy_block_to_block_type(block)
+        legacy = min(timeit.repeat(lambda: legacy_block_to_block_type(block), number=number, repeat=5)) / number
+        current = min(timeit.repeat(lambda: block_to_block_type(block), number=number, repeat=5)) / number
+        render = min(timeit.repeat(lambda: block_to_html_node(block), number=max(1, number // 10), repeat=3)) / max(1, number // 10)
+        print(f"{items:>6} items {name:<15} classify: legacy {legacy * 1e6:9.1f} us  now {current * 1e6:9.1f} us  ({legacy / current:5.2f}x)   render {render * 1e3:8.2f} ms")
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 1000, 5000]
+    for items in sizes:
+        bench(items, max(10, 20000 // items))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import sys
+import timeit
+
+from functions import scan_inline, split_nodes_delimiter, split_nodes_image, split_nodes_link
+from textnode import TextNode, TextType
+
+SENTENCE = "Some **bold words** and _an aside_ with `inline code`, an ![image](/images/tom.png) and a [link](/blog/tom). "
+
+def chained_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return split_nodes_link(split_nodes_image(nodes))
+
+def bench(sentences, number):
+    paragraph = SENTENCE * sentences
+    assert scan_inline(paragraph) == chained_text_to_textnodes(paragraph)
+    chained = min(timeit.repeat(lambda: chained_text_to_textnodes(paragraph), number=number, repeat=5)) / number
+    scanned = min(timeit.repeat(lambda: scan_inline(paragraph), number=number, repeat=5)) / number
+    print(f"{sentences:>6} sentences ({len(paragraph):>8} chars): chained {chained * 1e3:9.3f} ms  scan_inline {scanned * 1e3:9.3f} ms  speedup {chained / scanned:5.2f}x")
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 1000]
+    for sentences in sizes:
+        bench(sentences, max(1, 2000 // sentences))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+import re
+import sys
+import timeit
+
+from functions import extract_markdown_links, extract_markdown_images_with_alt_text, split_nodes_image, split_nodes_link, text_to_textnodes
+from textnode import TextNode, TextType
+
+def legacy_extract(pattern, text):
+    # the extractors as they were before the compiled patterns, kept as the baseline
+    result = []
+    for match in re.findall(pattern, text):
+        label, url = match
+        result.append((label, url))
+    return result
+
+def legacy_split(old_nodes, pattern, template, text_type):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        remaining_text = node.text
+        for label, url in legacy_extract(pattern, node.text):
+            tmp_parts = remaining_text.split(template.format(label, url), 1)
+            new_nodes.append(TextNode(tmp_parts[0], TextType.TEXT))
+            remaining_text = tmp_parts[1] if len(tmp_parts) > 1 else ""
+            new_nodes.append(TextNode(label, text_type, url))
+        if len(remaining_text) > 0:
+            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+    return new_nodes
+
+IMAGE = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
+LINK = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
+
+def legacy_split_images_and_links(nodes):
+    nodes = legacy_split(nodes, IMAGE, "![{}]({})", TextType.IMAGE)
+    return legacy_split(nodes, LINK, "[{}]({})", TextType.LINK)
+
+def sitemap_page(links, seed=0):
+    # one long line of links with an occasional thumbnail, like a generated index page
+    rng = random.Random(seed)
+    parts = []
+    for i in range(links):
+        parts.append(f"[Post number {i}](/blog/post-{i})")
+        if rng.random() < 0.1:
+            parts.append(f"![thumbnail {i}](/images/thumb-{i}.png)")
+    return " | ".join(parts)
+
+def bench(links, number):
+    text = sitemap_page(links)
+    nodes = [TextNode(text, TextType.TEXT)]
+    assert split_nodes_link(split_nodes_image(nodes)) == legacy_split_images_and_links(nodes)
+    assert extract_markdown_links(text) == legacy_extract(LINK, text)
+    legacy_extract_time = min(timeit.repeat(lambda: (legacy_extract(IMAGE, text), legacy_extract(LINK, text)), number=number, repeat=5)) / number
+    extract_time = min(timeit.repeat(lambda: (extract_markdown_images_with_alt_text(text), extract_markdown_links(text)), number=number, repeat=5)) / number
+    legacy_split_time = min(timeit.repeat(lambda: legacy_split_images_and_links(nodes), number=number, repeat=5)) / number
+    split_time = min(timeit.repeat(lambda: split_nodes_link(split_nodes_image(nodes)), number=number, repeat=5)) / number
+    inline_time = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=5)) / number
+    print(f"{links:>6} links ({len(text):>8} chars): extract legacy {legacy_extract_time * 1e3:8.3f} ms  now {extract_time * 1e3:8.3f} ms ({legacy_extract_time / extract_time:5.2f}x)"
+          f"   split legacy {legacy_split_time * 1e3:9.3f} ms  now {split_time * 1e3:8.3f} ms ({legacy_split_time / split_time:6.2f}x)   text_to_textnodes {inline_time * 1e3:8.3f} ms")
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000]
+    for links in sizes:
+        bench(links, max(1, 2000 // links))
+
+if __name__ == "__main__":
+    main()
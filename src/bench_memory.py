@@ -0,0 +1,49 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+from functions import markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+
+def load_corpus(content_dir):
+    pages = []
+    for dirpath, _, filenames in os.walk(content_dir):
+        for filename in sorted(filenames):
+            if filename.endswith(".md"):
+                with open(os.path.join(dirpath, filename), 'r') as f:
+                    pages.append(f.read())
+    return pages
+
+def count_nodes(node):
+    # inline TextNodes have no children attribute at all
+    if not getattr(node, "children", None):
+        return 1
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+def measure(build, pages, scale):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = [build(page) for _ in range(scale) for page in pages]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, current, elapsed
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    content_dir = os.path.join(os.path.dirname(__file__), "..", "content")
+    pages = load_corpus(content_dir)
+
+    text_nodes, text_bytes, text_time = measure(lambda page: [text_to_textnodes(block) for block in markdown_to_blocks(page) if not block.startswith("```")], pages, scale)
+    node_count = sum(len(nodes) for page in text_nodes for nodes in page)
+    print(f"TextNode lists: {node_count} nodes, {text_bytes / 2**20:8.1f} MiB retained ({text_bytes / node_count:6.1f} B/node), {text_time:.2f}s")
+    del text_nodes
+
+    trees, tree_bytes, tree_time = measure(markdown_to_html_node, pages, scale)
+    node_count = sum(count_nodes(tree) for tree in trees)
+    print(f"HTMLNode trees: {node_count} nodes, {tree_bytes / 2**20:8.1f} MiB retained ({tree_bytes / node_count:6.1f} B/node), {tree_time:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from blocks import block_to_block_type
+from functions import markdown_to_blocks, block_to_html_node, text_to_textnodes
+from main import generate_pages_recursive
+from parentnode import ParentNode
+
+DEFAULT_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "code": 1,
+    "quote": 1,
+    "unordered_list": 1,
+    "ordered_list": 1,
+}
+
+WORDS = (
+    "the ring hobbit shire elves wizard mountain river forest road journey tower "
+    "king sword shadow light song council fellowship dwarf map gate star"
+).split()
+
+TEMPLATE = '<!doctype html><html><head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet" /></head><body><article>{{ Content }}</article></body></html>'
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown block kind: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def generate_inline_text(rng, words, inline_density):
+    parts = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        if rng.random() < inline_density:
+            kind = rng.randrange(5)
+            if kind == 0:
+                word = f"**{word}**"
+            elif kind == 1:
+                word = f"_{word}_"
+            elif kind == 2:
+                word = f"`{word}`"
+            elif kind == 3:
+                word = f"[{word}](/blog/{word}{i})"
+            else:
+                word = f"![{word}](/images/{word}.png)"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def generate_block(rng, kind, inline_density, list_length):
+    if kind == "heading":
+        return "#" * rng.randint(2, 4) + " " + generate_inline_text(rng, 5, inline_density)
+    if kind == "code":
+        lines = [f"    {rng.choice(WORDS)}({rng.choice(WORDS)})" for _ in range(rng.randint(3, 12))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind == "quote":
+        return "\n".join("> " + generate_inline_text(rng, 12, inline_density) for _ in range(rng.randint(1, 4)))
+    if kind == "unordered_list":
+        return "\n".join("- " + generate_inline_text(rng, 8, inline_density) for _ in range(list_length))
+    if kind == "ordered_list":
+        return "\n".join(f"{i}. " + generate_inline_text(rng, 8, inline_density) for i in range(1, list_length + 1))
+    lines = [generate_inline_text(rng, 14, inline_density) for _ in range(rng.randint(1, 5))]
+    return "\n".join(lines)
+
+
+def generate_markdown_page(rng, blocks=20, mix=DEFAULT_MIX, inline_density=0.15, list_length=8):
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    parts = ["# " + generate_inline_text(rng, 4, 0)]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        parts.append(generate_block(rng, kind, inline_density, list_length))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(directory, pages=100, blocks=20, mix=DEFAULT_MIX, inline_density=0.15, list_length=8, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        path = os.path.join(directory, f"section{i % 10}", f"page{i}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(generate_markdown_page(rng, blocks, mix, inline_density, list_length))
+        paths.append(path)
+    return paths
+
+
+def time_stage(function, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def inline_texts(blocks):
+    # the text each inline-bearing block hands to text_to_textnodes
+    texts = []
+    for block in blocks:
+        if block.startswith("```"):
+            continue
+        for line in block.split("\n"):
+            texts.append(line.lstrip("#>-0123456789. "))
+    return texts
+
+
+def run_benchmarks(content_dir, repeat=3):
+    markdown_pages = []
+    for dirpath, _, filenames in os.walk(content_dir):
+        for filename in sorted(filenames):
+            if filename.endswith(".md"):
+                with open(os.path.join(dirpath, filename), 'r') as f:
+                    markdown_pages.append(f.read())
+    stages = {}
+
+    def record(name, seconds, items):
+        stages[name] = {"seconds": seconds, "items": items, "per_item_us": seconds / items * 1e6 if items else 0.0}
+
+    seconds, page_blocks = time_stage(lambda: [markdown_to_blocks(page) for page in markdown_pages], repeat)
+    blocks = [block for page in page_blocks for block in page]
+    record("markdown_to_blocks", seconds, len(markdown_pages))
+
+    seconds, _ = time_stage(lambda: [block_to_block_type(block) for block in blocks], repeat)
+    record("block_to_block_type", seconds, len(blocks))
+
+    texts = inline_texts(blocks)
+    seconds, _ = time_stage(lambda: [text_to_textnodes(text) for text in texts], repeat)
+    record("text_to_textnodes", seconds, len(texts))
+
+    seconds, trees = time_stage(lambda: [ParentNode("div", [block_to_html_node(block) for block in page]) for page in page_blocks], repeat)
+    record("block_to_html_node", seconds, len(blocks))
+
+    seconds, _ = time_stage(lambda: [tree.to_html() for tree in trees], repeat)
+    record("to_html", seconds, len(trees))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path = os.path.join(tmp, "template.html")
+        with open(template_path, 'w') as f:
+            f.write(TEMPLATE)
+        dest_dir = os.path.join(tmp, "docs")
+
+        def build():
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, template_path, dest_dir, basepath="/")
+
+        seconds, _ = time_stage(build, repeat)
+        record("generate_pages_recursive", seconds, len(markdown_pages))
+    return stages
+
+
+def current_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200, help="number of generated pages (default 200)")
+    parser.add_argument("--blocks", type=int, default=20, help="blocks per page (default 20)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="block weights, e.g. paragraph=6,heading=2,code=1")
+    parser.add_argument("--inline-density", type=float, default=0.15, help="fraction of words with inline markup (default 0.15)")
+    parser.add_argument("--list-length", type=int, default=8, help="items per list block (default 8)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the corpus (default 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is reported (default 3)")
+    parser.add_argument("--content", metavar="DIR", help="benchmark an existing content directory instead of a generated corpus")
+    parser.add_argument("--output", "-o", metavar="FILE", help="write the JSON results to FILE instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    corpus = {
+        "pages": args.pages,
+        "blocks": args.blocks,
+        "mix": args.mix,
+        "inline_density": args.inline_density,
+        "list_length": args.list_length,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = args.content
+        if content_dir is None:
+            content_dir = os.path.join(tmp, "content")
+            generate_corpus(content_dir, args.pages, args.blocks, args.mix, args.inline_density, args.list_length, args.seed)
+        else:
+            corpus = {"content": content_dir}
+        stages = run_benchmarks(content_dir, args.repeat)
+    results = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "corpus": corpus,
+        "repeat": args.repeat,
+        "stages": stages,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,28 +8,36 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
+# "1. ", "2. ", ... built once and reused instead of formatting a prefix per line
+_ordered_prefixes = []
+
+def ordered_list_prefixes(count):
+    while len(_ordered_prefixes) < count:
+        _ordered_prefixes.append(f"{len(_ordered_prefixes) + 1}. ")
+    return _ordered_prefixes
+
 def block_to_block_type(block):
-    lines = block.split("\n")
+    return classify_block(block)[0]
 
+# Returns (block_type, lines). lines is the block split on "\n" when classification
+# needed it, so the renderers can reuse it, and None otherwise.
+def classify_block(block):
     if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
+        return BlockType.HEADING, None
     if block.startswith("```"):
-        return BlockType.CODE
+        return BlockType.CODE, None
+    # every line starts with the marker exactly when every newline is followed by it
     if block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
+        if block.count("\n") == block.count("\n>"):
+            return BlockType.QUOTE, block.split("\n")
+        return BlockType.PARAGRAPH, None
     if block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.UNORDERED_LIST
+        if block.count("\n") == block.count("\n- "):
+            return BlockType.UNORDERED_LIST, block.split("\n")
+        return BlockType.PARAGRAPH, None
     if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
\ No newline at end of file
+        lines = block.split("\n")
+        if all(map(str.startswith, lines, ordered_list_prefixes(len(lines)))):
+            return BlockType.ORDERED_LIST, lines
+        return BlockType.PARAGRAPH, lines
+    return BlockType.PARAGRAPH, None
@@ -0,0 +1,58 @@
+from collections import Counter
+
+from buildprofile import BuildProfile, PageTimer
+
+
+class PageContext:
+    # what rendering one page collects besides its output; a part left None is not collected.
+    # timer is a buildprofile.PageTimer, references a list of (kind, url), metadata a dict that
+    # receives "title", "summary", "words" and "updated", and terms a Counter of search terms;
+    # blocks are rendered through cache, a BlockCache, when it is set
+    def __init__(self, cache=None, timer=None, references=None, metadata=None, terms=None):
+        self.cache = cache
+        self.timer = timer
+        self.references = references
+        self.metadata = metadata
+        self.terms = terms
+
+
+class BuildContext:
+    # what a build collects from its pages, keyed by source path; a part left None is not
+    # collected. profile is a buildprofile.BuildProfile, references {source: [(kind, url), ...]},
+    # metadata {source: page metadata} and terms {source: Counter of search terms}
+    def __init__(self, cache=None, profile=None, references=None, metadata=None, terms=None):
+        self.cache = cache
+        self.profile = profile
+        self.references = references
+        self.metadata = metadata
+        self.terms = terms
+
+    def for_worker(self):
+        # the same parts, empty and without the cache, for a pool worker to fill in
+        return BuildContext(
+            None,
+            BuildProfile() if self.profile is not None else None,
+            {} if self.references is not None else None,
+            {} if self.metadata is not None else None,
+            {} if self.terms is not None else None,
+        )
+
+    def page_context(self, cache=None):
+        return PageContext(
+            cache if cache is not None else self.cache,
+            PageTimer() if self.profile is not None else None,
+            [] if self.references is not None else None,
+            {} if self.metadata is not None else None,
+            Counter() if self.terms is not None else None,
+        )
+
+    def add_page(self, source, page, record=None):
+        # record is the page's buildprofile.page_record when it was profiled
+        if self.profile is not None and record is not None:
+            self.profile.add_record(record)
+        if self.references is not None and page.references is not None:
+            self.references[source] = page.references
+        if self.metadata is not None and page.metadata is not None:
+            self.metadata[source] = page.metadata
+        if self.terms is not None and page.terms is not None:
+            self.terms[source] = page.terms
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+STAGES = ("read", "split", "classify", "inline", "tree", "serialize", "template", "write")
+
+
+class PageTimer:
+    def __init__(self):
+        self.totals = {}
+
+    def add(self, stage, seconds):
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+
+    def total(self):
+        return sum(self.totals.values())
+
+    def time(self, stage, function, *args, **kwargs):
+        # time that nested calls already added to other stages is not counted again
+        start, nested = time.perf_counter(), self.total()
+        result = function(*args, **kwargs)
+        self.add(stage, time.perf_counter() - start - (self.total() - nested))
+        return result
+
+    def time_iter(self, stage, iterable):
+        # times every step of a lazy iterable, e.g. blocks read and split as they are rendered
+        iterator = iter(iterable)
+        while True:
+            start, nested = time.perf_counter(), self.total()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add(stage, time.perf_counter() - start - (self.total() - nested))
+            yield item
+
+
+def time_stage(timer, stage, function, *args, **kwargs):
+    # timer may be None, for pages that are not profiled
+    if timer is None:
+        return function(*args, **kwargs)
+    return timer.time(stage, function, *args, **kwargs)
+
+
+def time_stage_iter(timer, stage, iterable):
+    if timer is None:
+        return iterable
+    return timer.time_iter(stage, iterable)
+
+
+def page_record(page, timer, start, seconds):
+    return {
+        "page": page,
+        "pid": os.getpid(),
+        "start": start,
+        "seconds": seconds,
+        "stages": dict(timer.totals),
+    }
+
+
+class BuildProfile:
+    def __init__(self):
+        # one record per page: {"page", "pid", "start", "seconds", "stages"}
+        self.pages = []
+
+    def add_record(self, record):
+        self.pages.append(record)
+
+    def stage_totals(self):
+        totals = {stage: 0.0 for stage in STAGES}
+        for record in self.pages:
+            for stage, seconds in record["stages"].items():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def slowest_pages(self, top=10):
+        return sorted(self.pages, key=lambda record: record["seconds"], reverse=True)[:top]
+
+    def report(self, top=10):
+        totals = self.stage_totals()
+        overall = sum(totals.values())
+        print(f"Profiled {len(self.pages)} pages, {overall:.3f}s of page work")
+        print("Time per stage:")
+        for stage, seconds in totals.items():
+            share = 100 * seconds / overall if overall else 0.0
+            print(f"  {stage:<10} {seconds:9.3f}s {share:5.1f}%")
+        print(f"Slowest {min(top, len(self.pages))} pages:")
+        for record in self.slowest_pages(top):
+            stage, seconds = max(record["stages"].items(), key=lambda item: item[1], default=("-", 0.0))
+            print(f"  {record['seconds'] * 1000:9.2f} ms  {record['page']}  (mostly {stage}: {seconds * 1000:.2f} ms)")
+
+    def write_json(self, path):
+        data = {"stages": self.stage_totals(), "pages": self.pages}
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=1)
+
+    def write_chrome_trace(self, path):
+        # stage slices show each stage's total within the page, laid end to end,
+        # since per-block stages interleave too finely to trace one by one
+        origin = min((record["start"] for record in self.pages), default=0.0)
+        events = []
+        for record in self.pages:
+            start = (record["start"] - origin) * 1e6
+            events.append({
+                "name": record["page"], "cat": "page", "ph": "X", "ts": start,
+                "dur": record["seconds"] * 1e6, "pid": record["pid"], "tid": 0,
+            })
+            offset = start
+            for stage in STAGES:
+                seconds = record["stages"].get(stage)
+                if not seconds:
+                    continue
+                events.append({
+                    "name": stage, "cat": "stage", "ph": "X", "ts": offset,
+                    "dur": seconds * 1e6, "pid": record["pid"], "tid": 0, "args": {"page": record["page"]},
+                })
+                offset += seconds * 1e6
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,131 @@
+import gzip
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from assetsync import remove_output
+from manifest import hash_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "brotli": ".br"}
+# images and fonts are compressed already and gain nothing from another pass
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml")
+
+
+def available_formats():
+    if brotli is None:
+        return ["gzip"]
+    return ["gzip", "brotli"]
+
+
+def is_compressible(relative_path):
+    return relative_path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def compress_bytes(data, format):
+    if format == "gzip":
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if format == "brotli" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"unknown compression format: {format}")
+
+
+def iter_compressed(chunks, format):
+    # compress_bytes for data read a chunk at a time; the output is the same
+    if format == "gzip":
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.flush()
+    elif format == "brotli" and brotli is not None:
+        compressor = brotli.Compressor(quality=11)
+        for chunk in chunks:
+            yield compressor.process(chunk)
+        yield compressor.finish()
+    else:
+        raise ValueError(f"unknown compression format: {format}")
+
+
+def compressed_paths(path, formats):
+    return [path + COMPRESSED_SUFFIXES[format] for format in formats]
+
+
+def has_compressed(path, formats):
+    return all(os.path.exists(sibling) for sibling in compressed_paths(path, formats))
+
+
+def write_sibling(sibling, chunks):
+    tmp_path = f"{sibling}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.writelines(chunks)
+    os.replace(tmp_path, sibling)
+
+
+def write_compressed(path, data, formats):
+    # writes path + suffix for each format from data, the bytes path holds
+    for format, sibling in zip(formats, compressed_paths(path, formats)):
+        write_sibling(sibling, [compress_bytes(data, format)])
+
+
+def compress_file_chunks(path, formats, chunk_size=1 << 16):
+    # write_compressed for a file too large to read at once
+    for format, sibling in zip(formats, compressed_paths(path, formats)):
+        with open(path, 'rb') as f:
+            write_sibling(sibling, iter_compressed(iter(lambda: f.read(chunk_size), b""), format))
+
+
+def remove_compressed(path):
+    for suffix in COMPRESSED_SUFFIXES.values():
+        if os.path.lexists(path + suffix):
+            os.remove(path + suffix)
+
+
+def compress_file(path, formats, previous_hash=None):
+    # writes path + suffix for each format, unless the content hash equals previous_hash and
+    # every sibling is still there; returns (content hash, whether siblings were written)
+    with open(path, 'rb') as f:
+        data = f.read()
+    content_hash = hash_bytes(data)
+    if content_hash == previous_hash and has_compressed(path, formats):
+        return content_hash, False
+    write_compressed(path, data, formats)
+    return content_hash, True
+
+
+def _compress_task(task):
+    path, formats, previous_hash = task
+    return compress_file(path, formats, previous_hash)
+
+
+def compress_outputs(destination, relative_paths, previous_hashes=None, formats=None, jobs=1):
+    # previous_hashes maps relative output paths to the content hash their siblings were
+    # written from; siblings of outputs that are gone are removed. returns (hashes, counts)
+    if previous_hashes is None:
+        previous_hashes = {}
+    if formats is None:
+        formats = available_formats()
+    relative_paths = [p for p in relative_paths if is_compressible(p) and os.path.exists(os.path.join(destination, p))]
+    tasks = [(os.path.join(destination, p), formats, previous_hashes.get(p)) for p in relative_paths]
+    if jobs <= 1 or len(tasks) <= 1:
+        results = list(map(_compress_task, tasks))
+    else:
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_compress_task, tasks, chunksize=chunksize))
+    hashes = {}
+    counts = {"compressed": 0, "unchanged": 0, "removed": 0}
+    for relative_path, (content_hash, written) in zip(relative_paths, results):
+        hashes[relative_path] = content_hash
+        counts["compressed" if written else "unchanged"] += 1
+    for relative_path in previous_hashes:
+        if relative_path in hashes:
+            continue
+        for suffix in COMPRESSED_SUFFIXES.values():
+            remove_output(destination, relative_path + suffix)
+        counts["removed"] += 1
+    return hashes, counts
@@ -0,0 +1,60 @@
+import os
+
+from assetsync import DEFAULT_IGNORE, is_ignored
+from linkindex import LinkIndex
+
+
+def relative_within(path, directory):
+    # path relative to directory, or None when it lies outside of it
+    relative = os.path.relpath(os.path.abspath(path), os.path.abspath(directory))
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return None
+    return relative
+
+
+class DependencyGraph:
+    # page -> template, page -> referenced images and page -> linked pages, taken from the
+    # build manifest, which persists each page's references between runs
+    def __init__(self, template_path, pages):
+        self.template_path = template_path
+        # relative source path -> manifest entry
+        self.pages = pages
+        self.links = LinkIndex()
+        for relative_path, entry in pages.items():
+            self.links.add_page(relative_path, entry["output"], entry["references"])
+
+    def plan(self, changed_paths, content_dir, static_dir, ignore=DEFAULT_IGNORE):
+        # the outputs a change to changed_paths invalidates; only the template and a page's own
+        # source end up in its HTML, so images and linked pages never force a regeneration,
+        # but pages that referenced something removed are listed as now broken
+        plan = {"pages": set(), "removed_pages": set(), "assets": set(), "removed_assets": set(), "broken": set()}
+        for path in changed_paths:
+            if os.path.abspath(path) == os.path.abspath(self.template_path):
+                plan["pages"].update(relative_path for relative_path in self.pages if os.path.exists(os.path.join(content_dir, relative_path)))
+                continue
+            relative_path = relative_within(path, content_dir)
+            if relative_path is not None:
+                if not relative_path.endswith(".md"):
+                    continue
+                if os.path.exists(path):
+                    plan["pages"].add(relative_path)
+                elif relative_path in self.pages:
+                    plan["removed_pages"].add(relative_path)
+                    self._add_broken(plan, self.pages[relative_path]["output"])
+                continue
+            relative_path = relative_within(path, static_dir)
+            if relative_path is None or is_ignored(relative_path, ignore):
+                continue
+            if os.path.exists(path):
+                plan["assets"].add(relative_path)
+            else:
+                plan["removed_assets"].add(relative_path)
+                self._add_broken(plan, relative_path)
+        plan["pages"] -= plan["removed_pages"]
+        removed = {relative_path.replace(os.sep, "/") for relative_path in plan["removed_pages"]}
+        plan["broken"] = {(page, output) for page, output in plan["broken"] if page not in removed}
+        return plan
+
+    def _add_broken(self, plan, output):
+        for page in self.links.pages_referencing(output):
+            plan["broken"].add((page, output.replace(os.sep, "/")))
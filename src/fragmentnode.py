@@ -0,0 +1,17 @@
+from htmlnode import HTMLNode
+
+class FragmentNode(HTMLNode):
+    __slots__ = ("basepath",)
+
+    # value holds HTML that was already serialized for basepath
+    def __init__(self, html, basepath="/"):
+        super().__init__(None, html, None, None)
+        self.basepath = basepath or "/"
+
+    def to_html(self, basepath=None):
+        if (basepath or "/") != self.basepath:
+            raise ValueError(f"fragment was rendered for basepath {self.basepath}, not {basepath}")
+        return self.value
+
+    def __repr__(self):
+        return f"FragmentNode(value={self.value}, basepath={self.basepath})"
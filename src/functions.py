@@ -1,9 +1,30 @@
+import codecs
+import html
+import locale
+import mmap
+import os
 import re
+import time
 
 from textnode import TextNode, TextType
-from blocks import block_to_block_type, BlockType
-from leafnode import LeafNode
-from parentnode import ParentNode
+from blocks import classify_block, BlockType
+from parentnode import InlineParentNode, ParentNode, TextParentNode
+from fragmentnode import FragmentNode
+from htmlescape import escape_text
+
+# bump whenever a change to the renderers changes their output; it is part of the block cache key
+RENDERER_VERSION = 3
+
+INLINE_DELIMITER_PATTERN = re.compile(r"\*\*|[_`]")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# search terms are lowercased runs of word characters; single characters are not indexed
+TERM_PATTERN = re.compile(r"\w\w+")
+# the tags the renderers write; text may hold a bare "<" that starts no tag
+TAG_PATTERN = re.compile(r"</?[a-z][a-z0-9]*(?:\s[^>]*)?>")
+# code blocks of this many bytes or more are streamed from the mapped source instead of copied
+LARGE_CODE_BLOCK_SIZE = 1 << 20
+SOURCE_WHITESPACE = b" \t\n\r\x0b\x0c"
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
@@ -26,65 +47,125 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def extract_markdown_images_with_alt_text(text):
-    result = []
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    for match in matches:
-        alt_text, url = match
-        result.append((alt_text, url))
-    return result
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-    result = []
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    for match in matches:
-        link_text, url = match
-        result.append((link_text, url))
-    return result
+    return LINK_PATTERN.findall(text)
 
 def split_nodes_image(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if isinstance(node, TextNode):
-            if node.text_type != TextType.TEXT:
-                new_nodes.append(node)
-            else:
-                parts = extract_markdown_images_with_alt_text(node.text)
-                remaining_text = node.text
-                for alt_text, url in parts:
-                    tmp_parts = remaining_text.split(f"![{alt_text}]({url})", 1)
-                    new_nodes.append(TextNode(tmp_parts[0], TextType.TEXT))
-                    remaining_text = tmp_parts[1] if len(tmp_parts) > 1 else ""
-                    new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-                if len(remaining_text) > 0:
-                    new_nodes.append(TextNode(remaining_text, TextType.TEXT))
-        else:
-            raise TypeError("All nodes must be of type TextNode")
-    return new_nodes
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
 def split_nodes_link(old_nodes):
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+def split_nodes_pattern(old_nodes, pattern, text_type):
+    # pattern captures (text, url); each TEXT node is scanned once and cut at the match
+    # offsets, so the text is never searched again for the matched markdown
     new_nodes = []
     for node in old_nodes:
-        if isinstance(node, TextNode):
-            if node.text_type != TextType.TEXT:
-                new_nodes.append(node)
-            else:
-                parts = extract_markdown_links(node.text)
-                remaining_text = node.text
-                for link_text, url in parts:
-                    tmp_parts = remaining_text.split(f"[{link_text}]({url})", 1)
-                    new_nodes.append(TextNode(tmp_parts[0], TextType.TEXT))
-                    remaining_text = tmp_parts[1] if len(tmp_parts) > 1 else ""
-                    new_nodes.append(TextNode(link_text, TextType.LINK, url))
-                if len(remaining_text) > 0:
-                    new_nodes.append(TextNode(remaining_text, TextType.TEXT))
-        else:
+        if not isinstance(node, TextNode):
             raise TypeError("All nodes must be of type TextNode")
+        if node.text_type != TextType.TEXT:
+            new_nodes.append(node)
+            continue
+        text = node.text
+        position = 0
+        for match in pattern.finditer(text):
+            new_nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
+        if position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     return new_nodes
 
-def text_to_textnodes(text):
-    return split_nodes_link(split_nodes_image(split_nodes_delimiter(split_nodes_delimiter(split_nodes_delimiter([TextNode(text, TextType.TEXT)], "**", TextType.BOLD), "_", TextType.ITALIC), "`", TextType.CODE)))
+def text_to_textnodes(text, timer=None):
+    if timer is None:
+        return scan_inline(text)
+    start = time.perf_counter()
+    nodes = scan_inline(text)
+    timer.add("inline", time.perf_counter() - start)
+    return nodes
+
+# Single left-to-right walk producing the same nodes as
+# split_nodes_link(split_nodes_image(split_nodes_delimiter(... "**" ... "_" ... "`"))).
+# "**" takes precedence over "_", which takes precedence over "`"; a delimiter with
+# lower precedence is literal inside a span of higher precedence, and a span that is
+# still open when a higher-precedence delimiter appears is unbalanced.
+def scan_inline(text):
+    return scan_spans(text, _append_span, [])
+
+# append_span(text, start, end, text_type, result) receives each span in order, with
+# text_type None for the text outside any delimiters; returns result
+def scan_spans(text, append_span, result):
+    bold = italic = code = False
+    start = 0
+    for match in INLINE_DELIMITER_PATTERN.finditer(text):
+        delimiter = match.group()
+        position = match.start()
+        if delimiter == "**":
+            if italic or code:
+                raise ValueError("invalid markdown, formatted section not closed")
+            append_span(text, start, position, TextType.BOLD if bold else None, result)
+            bold = not bold
+        elif bold:
+            continue
+        elif delimiter == "_":
+            if code:
+                raise ValueError("invalid markdown, formatted section not closed")
+            append_span(text, start, position, TextType.ITALIC if italic else None, result)
+            italic = not italic
+        elif italic:
+            continue
+        else:
+            append_span(text, start, position, TextType.CODE if code else None, result)
+            code = not code
+        start = match.end()
+    if bold or italic or code:
+        raise ValueError("invalid markdown, formatted section not closed")
+    append_span(text, start, len(text), None, result)
+    return result
+
+def _append_span(text, start, end, text_type, nodes):
+    if start == end:
+        return
+    if text_type is not None:
+        nodes.append(TextNode(text[start:end], text_type))
+        return
+    section = text[start:end]
+    if "[" not in section:
+        nodes.append(TextNode(section, TextType.TEXT))
+        return
+    position = 0
+    for match in IMAGE_PATTERN.finditer(section):
+        _append_links(section[position:match.start()], nodes)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        position = match.end()
+    _append_links(section[position:], nodes)
+
+def _append_links(text, nodes):
+    if not text:
+        return
+    position = 0
+    for match in LINK_PATTERN.finditer(text):
+        nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        position = match.end()
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
+
+def _append_span_references(text, start, end, text_type, references):
+    # the references _append_span's nodes would hold, in the same order
+    if text_type is not None or start == end:
+        return
+    section = text[start:end]
+    if "](" not in section:
+        return
+    position = 0
+    for match in IMAGE_PATTERN.finditer(section):
+        references.extend(("link", url) for _, url in LINK_PATTERN.findall(section, position, match.start()))
+        references.append(("image", match.group(2)))
+        position = match.end()
+    references.extend(("link", url) for _, url in LINK_PATTERN.findall(section, position))
 
 def markdown_to_blocks(markdown):
     blocks = markdown.split("\n\n")
@@ -97,29 +178,266 @@ def markdown_to_blocks(markdown):
     return filtered_blocks
 
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+# Yields the same blocks as markdown_to_blocks(stream.read()) while holding only
+# the current chunk and the unfinished block in memory.
+def iter_markdown_blocks(stream, chunk_size=1 << 16):
+    # the unfinished block is kept as a list of chunk pieces and joined once it ends, and
+    # each chunk is searched once, so a block spanning many chunks is not recopied
+    pending = []
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        start = 0
+        if pending and chunk[0] == "\n" and pending[-1][-1] == "\n":
+            # the separator straddles the two chunks
+            block = "".join(pending)[:-1]
+            if block:
+                yield block.strip()
+            pending = []
+            start = 1
+        while True:
+            end = chunk.find("\n\n", start)
+            if end == -1:
+                break
+            pending.append(chunk[start:end])
+            block = "".join(pending)
+            if block:
+                yield block.strip()
+            pending = []
+            start = end + 2
+        if start < len(chunk):
+            pending.append(chunk[start:])
+    if pending:
+        yield "".join(pending).strip()
+
+
+def map_source(f, min_size=LARGE_CODE_BLOCK_SIZE):
+    # a read-only map of the binary file f when it may hold a large code block and its
+    # mapped bytes decode to the text open(path, 'r') reads; None otherwise
+    if os.fstat(f.fileno()).st_size < min_size:
+        return None
+    if codecs.lookup(locale.getpreferredencoding(False)).name != "utf-8":
+        return None
+    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped.find(b"\r") != -1:
+        # text mode would translate its line endings
+        mapped.close()
+        return None
+    return mapped
+
+
+# Yields the same blocks as iter_markdown_blocks on the decoded source, except that a
+# code block of large_block_size bytes or more is yielded as a MappedCodeBlock, so its
+# body is never decoded or copied as a whole. "\n" is never part of a multi-byte UTF-8
+# sequence, so blocks split at the same places in the bytes as in the text.
+def iter_mapped_blocks(source, large_block_size=LARGE_CODE_BLOCK_SIZE):
+    start = 0
+    size = len(source)
+    while start < size:
+        end = source.find(b"\n\n", start)
+        if end == -1:
+            end = size
+        if end > start:
+            yield mapped_block(source, start, end, large_block_size)
+        start = end + 2
+
+
+def mapped_block(source, start, end, large_block_size):
+    if end - start >= large_block_size:
+        first, last = start, end
+        while first < last and source[first] in SOURCE_WHITESPACE:
+            first += 1
+        while last > first and source[last - 1] in SOURCE_WHITESPACE:
+            last -= 1
+        # str.strip() stops at the same backticks, so the block is exactly source[first:last]
+        if last - first >= 7 and source[first:first + 3] == b"```" and source[last - 3:last] == b"```":
+            return MappedCodeBlock(source, first, last)
+    return source[start:end].decode("utf-8").strip()
+
+
+class MappedCodeBlock:
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source, start, end):
+        # source[start:end] holds the whole block, fences included
+        self.source = source
+        self.start = start
+        self.end = end
+
+    def body_range(self):
+        # the bytes of block[4:-3], which code_to_html_node renders; the character after
+        # the opening fence may take up to four bytes
+        lead = self.source[self.start + 3]
+        width = 1 if lead < 0x80 else 2 if lead < 0xe0 else 3 if lead < 0xf0 else 4
+        return self.start + 3 + width, self.end - 3
+
+    def iter_html(self, basepath=None, chunk_size=1 << 16):
+        # the body is decoded and escaped a chunk at a time; the incremental decoder
+        # carries a character split between two chunks over to the next one
+        start, end = self.body_range()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        yield "<pre><code>"
+        for position in range(start, end, chunk_size):
+            yield escape_text(decoder.decode(self.source[position:min(position + chunk_size, end)]))
+        yield escape_text(decoder.decode(b"", final=True))
+        yield "</code></pre>"
+
+
+# timer is an optional stage timer, as for markdown_to_html_node
+def iter_blocks_html(blocks, basepath=None, cache=None, references=None, terms=None, timer=None):
+    # serializes each block as soon as it is rendered, so only one block's tree is alive at a time
+    yield "<div>"
+    for block in blocks:
+        if isinstance(block, MappedCodeBlock):
+            # a large listing is neither cached nor indexed for search, and holds no links
+            yield from block.iter_html(basepath)
+            continue
+        if cache is None:
+            html_node = block_to_html_node(block, timer)
+        else:
+            html_node = cached_block_to_html_node(block, cache, timer)
+        if references is not None:
+            block_references(block, html_node, references)
+        if terms is not None:
+            block_terms(html_node, terms)
+        yield from html_node.iter_html(basepath)
+    yield "</div>"
+
+
+# timer is an optional stage timer (see buildprofile.PageTimer); when given, the
+# time spent splitting, classifying, parsing inline markup and building the tree
+# is added to its "split", "classify", "inline" and "tree" stages
+# references is an optional list; when given, ("link", url) and ("image", url) are
+# appended to it for every link and image in the rendered markdown
+# terms is an optional collections.Counter that receives the search terms of the page's text
+def markdown_to_html_node(markdown, cache=None, timer=None, references=None, terms=None):
+    if timer is None:
+        blocks = markdown_to_blocks(markdown)
+    else:
+        start = time.perf_counter()
+        blocks = markdown_to_blocks(markdown)
+        timer.add("split", time.perf_counter() - start)
     children = []
     for block in blocks:
-        html_node = block_to_html_node(block)
+        if cache is None:
+            html_node = block_to_html_node(block, timer)
+        else:
+            html_node = cached_block_to_html_node(block, cache, timer)
+        if references is not None:
+            block_references(block, html_node, references)
+        if terms is not None:
+            block_terms(html_node, terms)
         children.append(html_node)
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def block_references(block, html_node, references):
+    # every link and image is written as ](url), so other blocks need no walk
+    if "](" not in block:
+        return
+    if isinstance(html_node, FragmentNode):
+        # a cached block has no tree left to walk, so its markdown is scanned instead
+        for text in inline_texts(block):
+            scan_spans(text, _append_span_references, references)
+        return
+    collect_references(html_node, references)
+
+
+def inline_texts(block):
+    # the texts render_block passes to text_to_textnodes, found without rendering the block
+    block_type, lines = classify_block(block)
     if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
+        return [block.replace("\n", " ") if lines is None else " ".join(lines)]
     if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
+        return [block[len(block) - len(block.lstrip("#")) + 1 :]]
+    if block_type == BlockType.ORDERED_LIST:
+        return [item[3:] for item in lines]
+    if block_type == BlockType.UNORDERED_LIST:
+        return [item[2:] for item in lines]
+    if block_type == BlockType.QUOTE:
+        return [" ".join(line.lstrip(">").strip() for line in lines)]
+    return []
+
+
+def collect_references(node, references):
+    if isinstance(node, TextNode):
+        if node.text_type == TextType.LINK:
+            references.append(("link", node.url))
+        elif node.text_type == TextType.IMAGE:
+            references.append(("image", node.url))
+        return
+    if node.tag == "a" and node.props and "href" in node.props:
+        references.append(("link", node.props["href"]))
+    elif node.tag == "img" and node.props and "src" in node.props:
+        references.append(("image", node.props["src"]))
+    for child in node.children or ():
+        collect_references(child, references)
+
+
+def block_terms(html_node, terms):
+    if isinstance(html_node, FragmentNode):
+        # a cached block keeps only its HTML; its text is what remains between the tags,
+        # so it is not rendered again just to be indexed
+        count_terms(html.unescape(TAG_PATTERN.sub(" ", html_node.value)), terms)
+        return
+    collect_terms(html_node, terms)
+
+
+def collect_terms(node, terms):
+    # the text of the TextNodes text_to_textnodes produced; an image's alt text is an
+    # attribute, so like the tags it is not part of the searchable text
+    if isinstance(node, TextNode):
+        if node.text_type != TextType.IMAGE:
+            count_terms(node.text, terms)
+        return
+    if node.value:
+        count_terms(node.value, terms)
+    for child in node.children or ():
+        collect_terms(child, terms)
+
+
+def count_terms(text, terms):
+    terms.update(TERM_PATTERN.findall(text.lower()))
+
+
+def cached_block_to_html_node(block, cache, timer=None):
+    html = cache.get(block)
+    if html is None:
+        html = block_to_html_node(block, timer).to_html(cache.basepath)
+        cache.put(block, html)
+    return FragmentNode(html, cache.basepath)
+
+
+def block_to_html_node(block, timer=None):
+    if timer is None:
+        block_type, lines = classify_block(block)
+        return render_block(block, block_type, None, lines)
+    start = time.perf_counter()
+    block_type, lines = classify_block(block)
+    timer.add("classify", time.perf_counter() - start)
+    inline_before = timer.totals.get("inline", 0.0)
+    start = time.perf_counter()
+    html_node = render_block(block, block_type, timer, lines)
+    inline_time = timer.totals.get("inline", 0.0) - inline_before
+    timer.add("tree", time.perf_counter() - start - inline_time)
+    return html_node
+
+
+# lines is the block already split on "\n" by classify_block, or None
+def render_block(block, block_type, timer=None, lines=None):
+    if block_type == BlockType.PARAGRAPH:
+        return paragraph_to_html_node(block, timer, lines)
+    if block_type == BlockType.HEADING:
+        return heading_to_html_node(block, timer)
     if block_type == BlockType.CODE:
         return code_to_html_node(block)
     if block_type == BlockType.ORDERED_LIST:
-        return olist_to_html_node(block)
+        return olist_to_html_node(block, timer, lines)
     if block_type == BlockType.UNORDERED_LIST:
-        return ulist_to_html_node(block)
+        return ulist_to_html_node(block, timer, lines)
     if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
+        return quote_to_html_node(block, timer, lines)
     raise ValueError("invalid block type")
 
 
@@ -132,14 +450,37 @@ def text_to_children(text):
     return children
 
 
-def paragraph_to_html_node(block):
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
-    return ParentNode("p", children)
+# The block renderers put TextNodes straight into the tree; they serialize
+# themselves, so no LeafNode is built per inline span. This returns a copy of
+# such a tree with every TextNode converted to its LeafNode for callers that
+# want a tree made of HTMLNodes only.
+def expand_text_nodes(node):
+    if isinstance(node, TextNode):
+        return TextNode.text_node_to_html_node(node)
+    if not isinstance(node, ParentNode):
+        return node
+    children = [expand_text_nodes(child) for child in node.children]
+    return ParentNode(node.tag, children, node.props)
+
+
+def inline_parent(text):
+    # the node type for the inline nodes of text; checking the whole text once is far
+    # cheaper than checking each inline node for characters to escape
+    if "&" in text or "<" in text or ">" in text:
+        return InlineParentNode
+    return TextParentNode
+
+
+def paragraph_to_html_node(block, timer=None, lines=None):
+    if lines is None:
+        paragraph = block.replace("\n", " ")
+    else:
+        paragraph = " ".join(lines)
+    children = text_to_textnodes(paragraph, timer)
+    return inline_parent(paragraph)("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, timer=None):
     level = 0
     for char in block:
         if char == "#":
@@ -149,50 +490,50 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    children = text_to_textnodes(text, timer)
+    return inline_parent(text)(f"h{level}", children)
 
 
 def code_to_html_node(block):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
     text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = TextNode.text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
-    return ParentNode("pre", [code])
+    return inline_parent(text)("pre", [TextNode(text, TextType.CODE)])
 
 
-def olist_to_html_node(block):
-    items = block.split("\n")
+def olist_to_html_node(block, timer=None, lines=None):
+    items = lines if lines is not None else block.split("\n")
     html_items = []
+    item_parent = inline_parent(block)
     for item in items:
         text = item[3:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
+        children = text_to_textnodes(text, timer)
+        html_items.append(item_parent("li", children))
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
-    items = block.split("\n")
+def ulist_to_html_node(block, timer=None, lines=None):
+    items = lines if lines is not None else block.split("\n")
     html_items = []
+    item_parent = inline_parent(block)
     for item in items:
         text = item[2:]
-        children = text_to_children(text)
-        html_items.append(ParentNode("li", children))
+        children = text_to_textnodes(text, timer)
+        html_items.append(item_parent("li", children))
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
-    lines = block.split("\n")
+def quote_to_html_node(block, timer=None, lines=None):
+    if lines is None:
+        lines = block.split("\n")
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
             raise ValueError("invalid quote block")
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
-    return ParentNode("blockquote", children)
+    children = text_to_textnodes(content, timer)
+    return inline_parent(content)("blockquote", children)
 '''
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
@@ -0,0 +1,13 @@
+def escape_text(text):
+    # most text holds none of the special characters and is returned as it is; otherwise
+    # chained str.replace is several times faster than str.translate on CPython
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attribute(value):
+    # escape_text plus the double quote that would end the attribute value
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
@@ -1,17 +1,49 @@
+from htmlescape import escape_attribute
+from template import prefix_url
+
+URL_ATTRIBUTES = ("href", "src")
+URL_CACHE_SIZE = 4096
+# basepath -> {url: url prefixed and escaped}; pages link the same few urls over and
+# over, so each is prefixed and escaped once rather than on every page
+_escaped_urls = {}
+
+
+def escape_url(url, basepath=None):
+    urls = _escaped_urls.get(basepath)
+    if urls is None:
+        urls = _escaped_urls[basepath] = {}
+    escaped = urls.get(url)
+    if escaped is None:
+        if len(urls) >= URL_CACHE_SIZE:
+            urls.clear()
+        escaped = urls[url] = escape_attribute(prefix_url(url, basepath))
+    return escaped
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    def to_html(self, basepath=None):
         raise NotImplementedError("Subclasses should implement this method")
+
+    def iter_html(self, basepath=None):
+        yield self.to_html(basepath)
+
+    def write_html(self, stream, basepath=None):
+        stream.writelines(self.iter_html(basepath))
     
-    def props_to_html(self):
+    def props_to_html(self, basepath=None):
         if not self.props:
             return ""
-        return " " + " ".join(f'{key}="{value}"' for key, value in self.props.items())
+        return "".join([
+            f' {key}="{escape_url(value, basepath) if key in URL_ATTRIBUTES else escape_attribute(value)}"' for key, value in self.props.items()
+        ])
 
     def __repr__(self):
-        return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props_to_html(self)})"
\ No newline at end of file
+        return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props_to_html()})"
\ No newline at end of file
@@ -1,20 +1,23 @@
+from htmlescape import escape_text
 from htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
-    def to_html(self):
+    def to_html(self, basepath=None):
         if self.value is None:
             raise ValueError("LeafNode must have a value to convert to HTML")
         elif self.tag is None:
-            return f"{self.value}"
+            return escape_text(self.value)
         else:
             if self.props is None:
-                return f"<{self.tag}>{self.value}</{self.tag}>"
+                return f"<{self.tag}>{escape_text(self.value)}</{self.tag}>"
             else:
-                return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-        return f"<{self.tag} {self.props_to_html()}/>"
+                return f"<{self.tag}{self.props_to_html(basepath)}>{escape_text(self.value)}</{self.tag}>"
+        return f"<{self.tag} {self.props_to_html(basepath)}/>"
     
     def __repr__(self):
         return f"LeafNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props_to_html()})"
\ No newline at end of file
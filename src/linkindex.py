@@ -0,0 +1,77 @@
+import json
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+
+def reference_target(url, page_output):
+    # the output path an internal url points at, relative to the output root ("" for the
+    # root itself); None for external urls and same-page anchors
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        path = posixpath.join("/", posixpath.dirname(page_output), path)
+    return posixpath.normpath(path).lstrip("/")
+
+
+def find_output(target, outputs):
+    # a link to /blog/tom is served by blog/tom/index.html
+    for candidate in (target, posixpath.join(target, "index.html"), target + ".html"):
+        if candidate in outputs:
+            return candidate
+    return None
+
+
+def canonical_target(target):
+    if target == "index.html" or target.endswith("/index.html"):
+        target = target[:-len("index.html")]
+    return target.rstrip("/")
+
+
+class LinkIndex:
+    def __init__(self):
+        # page source path -> {"output": output path, "references": [(kind, url), ...]},
+        # where kind is "link" or "image" and paths use "/" as separator
+        self.pages = {}
+        self._referrers = None
+
+    def add_page(self, page, output, references):
+        page = page.replace(os.sep, "/")
+        self.pages[page] = {"output": output.replace(os.sep, "/"), "references": [tuple(reference) for reference in references]}
+        self._referrers = None
+
+    def internal_references(self):
+        for page, entry in sorted(self.pages.items()):
+            for kind, url in entry["references"]:
+                target = reference_target(url, entry["output"])
+                if target is not None:
+                    yield page, kind, url, target
+
+    def broken_references(self, outputs):
+        # (page, kind, url) for every internal link or image that no output serves
+        outputs = {output.replace(os.sep, "/") for output in outputs}
+        return [(page, kind, url) for page, kind, url, target in self.internal_references() if find_output(target, outputs) is None]
+
+    def pages_referencing(self, target):
+        # target is a url such as /images/tom.png or /blog/tom, or an output path
+        if self._referrers is None:
+            self._referrers = {}
+            for page, _, _, page_target in self.internal_references():
+                self._referrers.setdefault(canonical_target(page_target), set()).add(page)
+        key = canonical_target(reference_target(target, "") or "")
+        return sorted(self._referrers.get(key, ()))
+
+    def report(self, outputs):
+        broken = self.broken_references(outputs)
+        for page, kind, url in broken:
+            problem = "missing image" if kind == "image" else "broken link"
+            print(f"{page}: {problem} {url}")
+        references = sum(len(entry["references"]) for entry in self.pages.values())
+        print(f"Link check: {references} links and images in {len(self.pages)} pages, {len(broken)} broken")
+        return broken
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.pages, f, indent=1, sort_keys=True)
@@ -1,33 +1,198 @@
+import argparse
+import io
 import os
 import shutil
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-from functions import markdown_to_html_node
+from buildcontext import BuildContext, PageContext
+from buildprofile import BuildProfile, page_record, time_stage, time_stage_iter
+from assetsync import DEFAULT_IGNORE, LINK_METHODS, find_assets, remove_output, sync_static, transfer_file
+from compress import COMPRESSED_SUFFIXES, available_formats, compress_file_chunks, compress_outputs, has_compressed
+from depgraph import DependencyGraph
+from functions import LARGE_CODE_BLOCK_SIZE, RENDERER_VERSION, markdown_to_html_node, iter_mapped_blocks, iter_markdown_blocks, iter_blocks_html, map_source
+from linkindex import LinkIndex
+from manifest import BuildManifest, hash_file
+from outputwriter import OutputWriter, create_directories, write_file_if_changed
+from rendercache import BlockCache
+from searchindex import search_outputs, write_search_index
+from sections import describe_blocks, generate_sections, is_absolute_url
+from template import load_template
 
-def main():
-    basepath = "/"
-    if sys.argv[1]:
-        basepath = sys.argv[1]
-    init_file_copy("./static", "./docs")
-    generate_pages_recursive("./content", "./template.html", "./docs", "./content", basepath=basepath)
+MANIFEST_PATH = "./.build-manifest.json"
+# stands in for the basepath when one rendered page is written for several targets;
+# a private use character, so it does not occur in ordinary content
+URL_MARKER = "\ue000"
 
-def init_file_copy(source, destination):
+_worker_cache = None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site from ./content into ./docs")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+    parser.add_argument("--incremental", action="store_true", help="only regenerate pages whose sources, template or basepath changed")
+    parser.add_argument("--checksum", action="store_true", help="with --incremental, compare static files by content hash instead of mtime")
+    parser.add_argument("--link", choices=LINK_METHODS, default="copy", help="how --incremental puts static files into ./docs (default copy)")
+    parser.add_argument("--ignore", action="append", default=[], metavar="PATTERN", help="skip static files matching PATTERN (repeatable)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N", help="render pages across N worker processes (0 = one per CPU)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="print one summary line instead of a line per page")
+    parser.add_argument("--profile", action="store_true", help="time each build stage per page and report the slowest pages")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest pages to list (default 10)")
+    parser.add_argument("--profile-json", metavar="FILE", help="write the per-page stage timings to FILE as JSON (implies --profile)")
+    parser.add_argument("--profile-trace", metavar="FILE", help="write a Chrome trace (chrome://tracing, Perfetto) to FILE (implies --profile)")
+    parser.add_argument("--cache", action="store_true", help="reuse rendered HTML for identical markdown blocks")
+    parser.add_argument("--cache-dir", metavar="DIR", help="also keep the block cache on disk in DIR between builds (implies --cache)")
+    parser.add_argument("--cache-size", type=int, default=4096, metavar="N", help="maximum number of cached blocks (default 4096)")
+    parser.add_argument("--compress", action="store_true", help="write precompressed .gz (and .br with brotli installed) siblings of changed text outputs")
+    parser.add_argument("--changed", nargs="+", metavar="PATH", help="regenerate only the outputs that depend on PATHs, using the dependency graph of the last incremental build")
+    parser.add_argument("--check-links", action="store_true", help="report internal links and images that point at no page or static file")
+    parser.add_argument("--link-index", metavar="FILE", help="write every page's links and images to FILE as JSON")
+    parser.add_argument("--sections", action="store_true", help="write paginated listing pages and an Atom feed for every section such as content/blog")
+    parser.add_argument("--section-page-size", type=int, default=10, metavar="N", help="pages listed per section listing page (default 10)")
+    parser.add_argument("--site-url", default="", metavar="URL", help="absolute site url for feed ids and links, e.g. https://example.com (required with --sections)")
+    parser.add_argument("--search", action="store_true", help="write a search index of the pages' text, sharded by term prefix, to ./docs/search")
+    parser.add_argument("--target", action="append", type=parse_target, default=[], metavar="BASEPATH=DIR", help="render once and write the site for each BASEPATH into DIR (repeatable, replaces basepath and ./docs)")
+    args = parser.parse_args(argv)
+    if args.target and (args.incremental or args.changed or args.sections or args.search or args.profile or args.profile_json or args.profile_trace):
+        parser.error("--target cannot be combined with --incremental, --changed, --sections, --search or profiling")
+    if args.cache_size < 0:
+        parser.error("--cache-size must be 0 or a positive number")
+    if args.sections and not is_absolute_url(args.site_url):
+        parser.error("--sections writes Atom feeds, which need an absolute --site-url such as https://example.com")
+    if args.section_page_size < 1:
+        parser.error("--section-page-size must be a positive number")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+def parse_target(text):
+    basepath, separator, dest_dir = text.partition("=")
+    if not separator or not dest_dir:
+        raise argparse.ArgumentTypeError(f"expected BASEPATH=DIR, got {text}")
+    return basepath or "/", dest_dir
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "watch":
+        # imported here because watch builds on the functions in this module
+        from watch import watch_main
+        return watch_main(argv[1:])
+    args = parse_args(argv)
+    basepath = args.basepath or "/"
+    cache = None
+    if args.cache or args.cache_dir:
+        # generate_pages_targets serializes once for every target, with URL_MARKER as the basepath
+        cache = BlockCache(args.cache_size, args.cache_dir, URL_MARKER if args.target else basepath)
+    profile = None
+    if args.profile or args.profile_json or args.profile_trace:
+        profile = BuildProfile()
+    verbose = not args.quiet
+    compress = available_formats() if args.compress else None
+    ignore = DEFAULT_IGNORE + args.ignore
+    references = {} if args.check_links or args.link_index else None
+    # search index entries are titled with the page metadata
+    metadata = {} if args.sections or args.search else None
+    terms = {} if args.search else None
+    context = BuildContext(cache, profile, references, metadata, terms)
+    # listing pages, feeds and search files written after the pages, for --check-links and --compress
+    generated_outputs = []
+    if args.target:
+        forget_rebuilt_outputs(MANIFEST_PATH, [dest_dir for _, dest_dir in args.target])
+        for _, dest_dir in args.target:
+            init_file_copy("./static", dest_dir, ignore)
+        generate_pages_targets("./content", "./template.html", args.target, jobs=args.jobs, context=context, verbose=verbose, compress=compress)
+        if args.compress:
+            for _, dest_dir in args.target:
+                compress_site("./content", "./static", dest_dir, MANIFEST_PATH, ignore, args.jobs)
+    elif args.changed:
+        generate_changed(args.changed, "./content", "./static", "./template.html", "./docs", MANIFEST_PATH, basepath=basepath, ignore=ignore, method=args.link, jobs=args.jobs, context=context, verbose=verbose, compress=compress)
+    elif args.incremental:
+        sync_static_incremental("./static", "./docs", MANIFEST_PATH, ignore=ignore, checksum=args.checksum, method=args.link)
+        generate_pages_incremental("./content", "./template.html", "./docs", MANIFEST_PATH, basepath=basepath, jobs=args.jobs, context=context, verbose=verbose, compress=compress)
+    else:
+        forget_rebuilt_outputs(MANIFEST_PATH, ["./docs"])
+        init_file_copy("./static", "./docs", ignore)
+        generate_pages_recursive("./content", "./template.html", "./docs", "./content", basepath=basepath, jobs=args.jobs, context=context, verbose=verbose, compress=compress)
+    if metadata is not None:
+        if args.incremental or args.changed:
+            # pages the build skipped keep the metadata and terms recorded in the manifest
+            pages = {relative_path: dict(entry["metadata"], terms=entry["terms"]) for relative_path, entry in BuildManifest.load(MANIFEST_PATH).pages.items()}
+        else:
+            pages = page_metadata("./content", metadata, terms)
+        if args.sections:
+            # the manifest remembers the listings and feeds, so those of emptied sections or
+            # dropped pages of a listing are removed by later incremental builds
+            manifest = BuildManifest.load(MANIFEST_PATH)
+            outputs = generate_sections(pages, load_template("./template.html", basepath), "./docs", args.site_url, args.section_page_size, manifest.sections)
+            removed = set(manifest.sections).difference(outputs)
+            manifest.sections = outputs
+            manifest.save(MANIFEST_PATH)
+            generated_outputs.extend(outputs)
+            print(f"Sections: {len(outputs)} listing pages and feeds written, {len(removed)} removed")
+        if args.search:
+            counts = write_search_index(pages, "./docs", basepath)
+            generated_outputs.extend(search_outputs("./docs"))
+            print(f"Search index: {counts['written']} shards written, {counts['unchanged']} unchanged, {counts['removed']} removed")
+    if args.compress and not args.target:
+        compress_site("./content", "./static", "./docs", MANIFEST_PATH, ignore, args.jobs, generated_outputs)
+    if cache is not None:
+        cache.prune_disk()
+        cache.report()
+    if profile is not None:
+        profile.report(args.profile_top)
+        if args.profile_json:
+            profile.write_json(args.profile_json)
+        if args.profile_trace:
+            profile.write_chrome_trace(args.profile_trace)
+    if references is not None:
+        if (args.incremental or args.changed) and not args.target:
+            # pages the incremental build skipped keep the references recorded in the manifest
+            index = link_index_from_manifest(BuildManifest.load(MANIFEST_PATH))
+        else:
+            index = link_index_from_references("./content", references)
+        if args.link_index:
+            index.write_json(args.link_index)
+        if args.check_links and index.report(site_outputs("./content", "./static", ignore) + generated_outputs):
+            return 1
+
+def forget_rebuilt_outputs(manifest_path, dest_dir_paths, pages_dir_path="./docs"):
+    # a full build recreates its output directories without the manifest, so what the
+    # manifest recorded about them no longer holds: its pages, static files and sections
+    # describe pages_dir_path, and its compressed siblings each output directory
+    if not os.path.exists(manifest_path):
+        return
+    manifest = BuildManifest.load(manifest_path)
+    keys = {os.path.normpath(path) for path in dest_dir_paths}
+    compressed = {key: hashes for key, hashes in manifest.compressed.items() if key not in keys}
+    if os.path.normpath(pages_dir_path) in keys:
+        manifest = BuildManifest(compressed=compressed)
+    else:
+        manifest.compressed = compressed
+    manifest.save(manifest_path)
+
+def init_file_copy(source, destination, ignore=DEFAULT_IGNORE):
     if not os.path.exists(source):
         print(f"Source directory {source} does not exist.")
         return
     delete_directory_and_subdirectories(destination)
-    copy_files_from(source, destination)
-
-def copy_files_from(source, destination):
-    if not os.path.exists(destination):
-        os.makedirs(destination)
-    for item in os.listdir(source):
-        s = os.path.join(source, item)
-        d = os.path.join(destination, item)
-        if os.path.isdir(s):
-            copy_files_from(s, d)
-        else:
-            shutil.copy2(s, d)
+    copy_files_from(source, destination, ignore)
+
+def copy_files_from(source, destination, ignore=DEFAULT_IGNORE):
+    # copies the files find_assets lists, so ignore patterns match paths relative to source
+    # as in sync_static, and --check-links sees exactly the files that were copied
+    os.makedirs(destination, exist_ok=True)
+    created_dirs = {destination}
+    for relative_path in find_assets(source, ignore):
+        dest_path = os.path.join(destination, relative_path)
+        dest_dir = os.path.dirname(dest_path)
+        if dest_dir not in created_dirs:
+            os.makedirs(dest_dir, exist_ok=True)
+            created_dirs.add(dest_dir)
+        shutil.copy2(os.path.join(source, relative_path), dest_path)
 
 def delete_directory_and_subdirectories(path):
     if os.path.exists(path) and os.path.isdir(path):
@@ -42,39 +207,372 @@ def delete_directory_and_subdirectories(path):
         print(f"Path {path} does not exist or is not a directory.")
 
 def extract_title(markdown):
-    lines = markdown.splitlines()
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:].strip()
+    # lines are read lazily, so scanning stops at the first "# " heading
+    return title_from_lines(io.StringIO(markdown))
+
+def extract_title_from_file(path):
+    # reads only up to the first "# " heading; same result as extract_title on the whole file
+    with open(path, 'r') as f:
+        return title_from_lines(f)
+
+def title_from_lines(lines):
+    # lines may end in any line break; splitlines() finds the same lines str.splitlines would
+    for text in lines:
+        for line in text.splitlines():
+            if line.startswith("# "):
+                return line[2:].strip()
     return None
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} using template {template_path} to {dest_path}")
+def generate_page(from_path, template_path, dest_path, basepath="/", template=None, page=None, verbose=True, writer=None):
+    # page is an optional buildcontext.PageContext: the cache to render through and what to
+    # collect from the page. Its timer's "read" stage covers the title and mapping the file;
+    # the source is read lazily as it is rendered, so reading the blocks counts as "split"
+    if verbose:
+        print(f"Generating page from {from_path} using template {template_path} to {dest_path}")
+    if template is None:
+        template = load_template(template_path, basepath)
+    if page is None:
+        page = PageContext()
+    title = time_stage(page.timer, "read", extract_title_from_file, from_path)
+    if page.metadata is not None:
+        page.metadata.update(title=title, updated=os.stat(from_path).st_mtime)
+    # a large source is streamed block by block to its output file through the writer, whose
+    # unchanged check then compares files in chunks; only smaller pages are queued as one string
+    with open(from_path, 'rb') as f:
+        large = os.fstat(f.fileno()).st_size >= LARGE_CODE_BLOCK_SIZE
+        mapped = time_stage(page.timer, "read", map_source, f)
+    if mapped is not None:
+        with mapped:
+            write_page_blocks(iter_mapped_blocks(mapped), dest_path, template, title, page, writer)
+        return
+    with open(from_path, 'r') as f:
+        if writer is None or large:
+            write_page_blocks(iter_markdown_blocks(f), dest_path, template, title, page, writer)
+        else:
+            write_page(iter_markdown_blocks(f), dest_path, template, title, page, writer)
+
+def write_page(blocks, dest_path, template, title, page, writer):
+    content = page_content(blocks, template, page)
+    html = time_stage(page.timer, "template", "".join, template.iter_render(Title=title, Content=content))
+    time_stage(page.timer, "write", writer.write, dest_path, html)
+
+def write_page_blocks(blocks, dest_path, template, title, page, writer=None):
+    # blocks are read, rendered and written one at a time, so memory stays bounded on huge
+    # sources; the file is still replaced atomically, and only when the page changed
+    def write(dest_file):
+        content = page_content(blocks, template, page)
+        time_stage(page.timer, "template", template.write, dest_file, Title=title, Content=content)
+    if writer is not None:
+        time_stage(page.timer, "write", writer.write_file, dest_path, write)
+    else:
+        time_stage(page.timer, "write", write_file_if_changed, dest_path, write)
+
+def page_content(blocks, template, page):
+    # each stage is timed without the stages nested in it, which run as its chunks are pulled
+    blocks = time_stage_iter(page.timer, "split", page_blocks(blocks, page.metadata))
+    return time_stage_iter(page.timer, "serialize", iter_blocks_html(blocks, template.basepath, page.cache, page.references, page.terms, page.timer))
+
+def page_blocks(blocks, metadata=None):
+    if metadata is None:
+        return blocks
+    return describe_blocks(blocks, metadata)
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, root_content_dir=None, basepath=None, jobs=1, context=None, verbose=True, compress=None):
+    if root_content_dir is None:
+        root_content_dir = dir_path_content
+    pages = []
+    for relative_path in find_markdown_files(dir_path_content, root_content_dir):
+        from_path = os.path.join(root_content_dir, relative_path)
+        dest_path = os.path.join(dest_dir_path, relative_path.replace('.md', '.html'))
+        pages.append((from_path, dest_path))
+    return generate_pages(pages, template_path, basepath=basepath, jobs=jobs, context=context, verbose=verbose, compress=compress)
+
+def generate_page_targets(from_path, relative_output, targets, writer, page, verbose=True):
+    # targets is a list of (dest_dir, template); the page is parsed and serialized once
+    # with URL_MARKER as basepath, and only the marker is replaced for each target
     with open(from_path, 'r') as f:
         markdown_content = f.read()
-    with open(template_path, 'r') as template_file:
-        template_content = template_file.read()
     title = extract_title(markdown_content)
-    html_content = markdown_to_html_node(markdown_content).to_html()
-    template_content = template_content.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
-    template_content = template_content.replace('href="/', f'href="{basepath}').replace('src="/', f'src="{basepath}')
-    if not os.path.exists(os.path.dirname(dest_path)):
-        os.makedirs(os.path.dirname(dest_path))
-    with open(dest_path, 'w') as dest_file:
-        dest_file.write(template_content)
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, root_content_dir=None, basepath=None):
+    if URL_MARKER in markdown_content:
+        # the marker would be mistaken for a URL prefix, so serialize per target instead
+        html_node = markdown_to_html_node(markdown_content, references=page.references)
+        contents = [html_node.to_html(template.basepath) for _, template in targets]
+    else:
+        html = markdown_to_html_node(markdown_content, page.cache, references=page.references).to_html(URL_MARKER)
+        contents = [html.replace(URL_MARKER, template.basepath) for _, template in targets]
+    for (dest_dir, template), content in zip(targets, contents):
+        dest_path = os.path.join(dest_dir, relative_output)
+        if verbose:
+            print(f"Generating page from {from_path} to {dest_path}")
+        writer.write(dest_path, template.render(Title=title, Content=content))
+
+def generate_pages_targets(dir_path_content, template_path, targets, jobs=1, context=None, verbose=True, compress=None):
+    # targets is a list of (basepath, dest_dir); returns {worker pid: (pages, seconds)}
+    if context is None:
+        context = BuildContext()
+    target_templates = [(dest_dir, load_template(template_path, basepath)) for basepath, dest_dir in targets]
+    pages = [(os.path.join(dir_path_content, relative_path), relative_path.replace('.md', '.html')) for relative_path in find_markdown_files(dir_path_content)]
+    created_dirs = create_directories(os.path.join(dest_dir, relative_output) for dest_dir, _ in target_templates for _, relative_output in pages)
+    tasks = [(from_path, relative_output, target_templates, verbose) for from_path, relative_output in pages]
+    build_start = time.perf_counter()
+    worker_stats, written, unchanged = run_page_tasks(_generate_targets_task, tasks, created_dirs, context, jobs, compress)
+    if not verbose:
+        workers = f" with {jobs} workers" if jobs > 1 and len(tasks) > 1 else ""
+        print(f"Generated {len(tasks)} pages for {len(targets)} targets in {time.perf_counter() - build_start:.2f}s{workers} ({written} written, {unchanged} unchanged)")
+    if jobs > 1 and len(tasks) > 1:
+        report_worker_throughput(worker_stats)
+    return worker_stats
+
+def _init_worker(cache_settings):
+    global _worker_cache
+    if cache_settings is not None:
+        _worker_cache = BlockCache(*cache_settings)
+
+def _run_page_task(generate, from_path, context):
+    # calls generate(page) with a new PageContext; returns the result collect_worker_stats
+    # takes: (pid, seconds, cache hits, cache misses, profile record or None, from_path, page)
+    page = context.page_context(_worker_cache)
+    cache = page.cache
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    start = time.perf_counter()
+    generate(page)
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    record = None
+    if page.timer is not None:
+        record = page_record(from_path, page.timer, start, elapsed)
+    # the page may go back to the parent process, which has a cache of its own
+    page.cache = None
+    return os.getpid(), elapsed, hits, misses, record, from_path, page
+
+def _generate_page_task(task, context, writer):
+    from_path, template_path, dest_path, template, verbose = task
+    def generate(page):
+        generate_page(from_path, template_path, dest_path, template=template, page=page, verbose=verbose, writer=writer)
+    return _run_page_task(generate, from_path, context)
+
+def _generate_targets_task(task, context, writer):
+    from_path, relative_output, targets, verbose = task
+    def generate(page):
+        generate_page_targets(from_path, relative_output, targets, writer, page, verbose)
+    return _run_page_task(generate, from_path, context)
+
+def _generate_batch_task(task_function, tasks, created_dirs, context, compress=None):
+    # one writer per batch, so a worker's writes overlap its rendering of the next pages
+    with OutputWriter(created_dirs, compress=compress) as writer:
+        results = [task_function(task, context, writer) for task in tasks]
+    return results, writer.written, writer.unchanged
+
+def run_page_tasks(task_function, tasks, created_dirs, context, jobs=1, compress=None):
+    # returns ({worker pid: (pages, seconds)}, files written, files left unchanged)
+    worker_stats = {}
+    if jobs <= 1 or len(tasks) <= 1:
+        with OutputWriter(created_dirs, compress=compress) as writer:
+            results = (task_function(task, context, writer) for task in tasks)
+            collect_worker_stats(results, worker_stats, context)
+        return worker_stats, writer.written, writer.unchanged
+    cache_settings = None
+    if context.cache is not None:
+        cache_settings = (context.cache.max_entries, context.cache.directory, context.cache.basepath)
+    batch_size = max(1, len(tasks) // (jobs * 4))
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+    written = unchanged = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(cache_settings,)) as executor:
+        for results, batch_written, batch_unchanged in executor.map(_generate_batch_task, repeat(task_function), batches, repeat(created_dirs), repeat(context.for_worker()), repeat(compress)):
+            collect_worker_stats(results, worker_stats, context, pooled=True)
+            written += batch_written
+            unchanged += batch_unchanged
+    return worker_stats, written, unchanged
+
+def generate_pages(pages, template_path, basepath="/", jobs=1, context=None, verbose=True, compress=None):
+    # pages is a list of (from_path, dest_path); context is an optional buildcontext.BuildContext
+    # with the cache and what to collect from the pages; returns {worker pid: (pages, seconds)}
+    if context is None:
+        context = BuildContext()
+    created_dirs = create_directories(dest_path for _, dest_path in pages)
+    template = load_template(template_path, basepath)
+    tasks = [(from_path, template_path, dest_path, template, verbose) for from_path, dest_path in pages]
+    build_start = time.perf_counter()
+    worker_stats, written, unchanged = run_page_tasks(_generate_page_task, tasks, created_dirs, context, jobs, compress)
+    if not verbose:
+        workers = f" with {jobs} workers" if jobs > 1 and len(tasks) > 1 else ""
+        print(f"Generated {len(tasks)} pages in {time.perf_counter() - build_start:.2f}s{workers} ({written} written, {unchanged} unchanged)")
+    if jobs > 1 and len(tasks) > 1:
+        report_worker_throughput(worker_stats)
+    return worker_stats
+
+def collect_worker_stats(results, worker_stats, context, pooled=False):
+    # context receives what each page collected; pooled results come from pool workers,
+    # whose block cache counts are added to context.cache
+    for pid, elapsed, hits, misses, record, from_path, page in results:
+        pages, seconds = worker_stats.get(pid, (0, 0.0))
+        worker_stats[pid] = (pages + 1, seconds + elapsed)
+        if pooled and context.cache is not None:
+            context.cache.add_counts(hits, misses)
+        context.add_page(from_path, page, record)
+    return worker_stats
+
+def report_worker_throughput(worker_stats):
+    for index, (pid, (pages, seconds)) in enumerate(sorted(worker_stats.items()), start=1):
+        rate = pages / seconds if seconds > 0 else float("inf")
+        print(f"Worker {index} (pid {pid}): {pages} pages in {seconds:.2f}s ({rate:.1f} pages/s)")
+
+def find_markdown_files(dir_path_content, root_content_dir=None):
     if root_content_dir is None:
         root_content_dir = dir_path_content
-    for item in os.listdir(dir_path_content):
+    sources = []
+    for item in sorted(os.listdir(dir_path_content)):
         item_path = os.path.join(dir_path_content, item)
         if os.path.isdir(item_path):
-            generate_pages_recursive(item_path, template_path, dest_dir_path, root_content_dir, basepath)
+            sources.extend(find_markdown_files(item_path, root_content_dir))
         elif item.endswith('.md'):
-            relative_path = os.path.relpath(item_path, root_content_dir)
-            dest_path = os.path.join(dest_dir_path, relative_path.replace('.md', '.html'))
-            if not os.path.exists(os.path.dirname(dest_path)):
-                os.makedirs(os.path.dirname(dest_path))
-            generate_page(item_path, template_path, dest_path, basepath=basepath)
+            sources.append(os.path.relpath(item_path, root_content_dir))
+    return sources
+
+def sync_static_incremental(source, destination, manifest_path, ignore=DEFAULT_IGNORE, checksum=False, method="copy"):
+    manifest = BuildManifest.load(manifest_path)
+    manifest.assets, counts = sync_static(source, destination, manifest.assets, ignore, checksum, method)
+    manifest.save(manifest_path)
+    transferred = counts["copy"] + counts["hardlink"] + counts["reflink"]
+    print(f"Static sync: {transferred} transferred ({counts['copy']} copied, {counts['hardlink']} hardlinked, {counts['reflink']} reflinked), {counts['unchanged']} unchanged, {counts['removed']} removed")
+    return counts
+
+def manifest_context(context=None):
+    # the manifest keeps each page's links, images, metadata and search terms, so incremental
+    # builds always collect them, with the cache and profile of the build's context
+    if context is None:
+        context = BuildContext()
+    return BuildContext(context.cache, context.profile, {}, {}, {})
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, manifest_path, basepath="/", jobs=1, context=None, verbose=True, compress=None):
+    old_manifest = BuildManifest.load(manifest_path)
+    template_hash = hash_file(template_path)
+    full_rebuild = not old_manifest.settings_match(template_hash, basepath)
+    new_manifest = BuildManifest(template_hash, basepath, assets=old_manifest.assets, compressed=old_manifest.compressed, sections=old_manifest.sections)
+    generated = []
+    pages = []
+    context = manifest_context(context)
+    for relative_path in find_markdown_files(dir_path_content):
+        source_path = os.path.join(dir_path_content, relative_path)
+        relative_output = relative_path.replace('.md', '.html')
+        dest_path = os.path.join(dest_dir_path, relative_output)
+        source_hash = hash_file(source_path)
+        if not full_rebuild and old_manifest.page_is_current(relative_path, source_hash) and os.path.exists(dest_path):
+            old_entry = old_manifest.pages[relative_path]
+            new_manifest.record_page(relative_path, source_hash, relative_output, old_entry["references"], old_entry["metadata"], old_entry["terms"])
+            continue
+        new_manifest.record_page(relative_path, source_hash, relative_output)
+        pages.append((source_path, dest_path))
+        generated.append(relative_path)
+    generate_pages(pages, template_path, basepath=basepath, jobs=jobs, context=context, verbose=verbose, compress=compress)
+    for relative_path, (source_path, _) in zip(generated, pages):
+        entry = new_manifest.pages[relative_path]
+        new_manifest.record_page(relative_path, entry["hash"], entry["output"], context.references.get(source_path, []), dict(context.metadata.get(source_path, {}), output=entry["output"]), context.terms.get(source_path))
+    removed = []
+    for relative_path, entry in old_manifest.pages.items():
+        if relative_path not in new_manifest.pages:
+            remove_page_output(dest_dir_path, entry["output"])
+            removed.append(relative_path)
+    new_manifest.save(manifest_path)
+    print(f"Incremental build: {len(generated)} generated, {len(removed)} removed, {len(new_manifest.pages) - len(generated)} unchanged")
+    return generated, removed
+
+def generate_changed(changed_paths, dir_path_content, static_dir, template_path, dest_dir_path, manifest_path, basepath="/", ignore=DEFAULT_IGNORE, method="copy", jobs=1, context=None, verbose=True, compress=None):
+    # trusts the manifest for every file not in changed_paths, so nothing else is hashed or walked
+    manifest = BuildManifest.load(manifest_path)
+    if not manifest.pages or manifest.basepath != basepath or manifest.renderer != RENDERER_VERSION:
+        print("No dependency graph from an earlier incremental build for this basepath and renderer, building incrementally")
+        sync_static_incremental(static_dir, dest_dir_path, manifest_path, ignore=ignore, method=method)
+        return generate_pages_incremental(dir_path_content, template_path, dest_dir_path, manifest_path, basepath=basepath, jobs=jobs, context=context, verbose=verbose, compress=compress)
+    template_hash = hash_file(template_path)
+    if template_hash != manifest.template_hash:
+        changed_paths = list(changed_paths) + [template_path]
+        manifest.template_hash = template_hash
+    plan = DependencyGraph(template_path, manifest.pages).plan(changed_paths, dir_path_content, static_dir, ignore)
+    generated = sorted(plan["pages"])
+    pages = [(os.path.join(dir_path_content, relative_path), os.path.join(dest_dir_path, relative_path.replace('.md', '.html'))) for relative_path in generated]
+    context = manifest_context(context)
+    generate_pages(pages, template_path, basepath=basepath, jobs=jobs, context=context, verbose=verbose, compress=compress)
+    for relative_path, (source_path, _) in zip(generated, pages):
+        relative_output = relative_path.replace('.md', '.html')
+        manifest.record_page(relative_path, hash_file(source_path), relative_output, context.references.get(source_path, []), dict(context.metadata.get(source_path, {}), output=relative_output), context.terms.get(source_path))
+    removed = sorted(plan["removed_pages"])
+    for relative_path in removed:
+        remove_page_output(dest_dir_path, manifest.pages.pop(relative_path)["output"])
+    assets = set(manifest.assets)
+    for relative_path in sorted(plan["assets"]):
+        dest_path = os.path.join(dest_dir_path, relative_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        transfer_file(os.path.join(static_dir, relative_path), dest_path, method)
+        assets.add(relative_path)
+    for relative_path in sorted(plan["removed_assets"]):
+        remove_output(dest_dir_path, relative_path)
+        assets.discard(relative_path)
+    manifest.assets = sorted(assets)
+    manifest.save(manifest_path)
+    for page, output in sorted(plan["broken"]):
+        print(f"{page}: still references removed {output}")
+    print(f"Changed build: {len(generated)} pages generated, {len(removed)} removed, {len(plan['assets'])} static files copied, {len(plan['removed_assets'])} removed")
+    return generated, removed
+
+def remove_page_output(dest_dir_path, relative_output):
+    # with the compressed siblings the OutputWriter wrote next to it
+    remove_output(dest_dir_path, relative_output)
+    for suffix in COMPRESSED_SUFFIXES.values():
+        remove_output(dest_dir_path, relative_output + suffix)
+
+def site_outputs(dir_path_content, static_dir, ignore=DEFAULT_IGNORE):
+    # the outputs are known from the sources, so the output tree is never walked
+    outputs = [relative_path.replace('.md', '.html') for relative_path in find_markdown_files(dir_path_content)]
+    if os.path.isdir(static_dir):
+        outputs.extend(find_assets(static_dir, ignore))
+    return outputs
+
+def compress_site(dir_path_content, static_dir, dest_dir_path, manifest_path, ignore=DEFAULT_IGNORE, jobs=1, generated_outputs=()):
+    # the OutputWriter compresses pages as it writes them, so only pages an earlier build wrote
+    # without --compress lack siblings here; static files are copied rather than written, and
+    # generated_outputs (listings, feeds, search files) written after the pages, so those are
+    # compared with the content hashes in the manifest
+    formats = available_formats()
+    pages = [os.path.join(dest_dir_path, relative_path.replace('.md', '.html')) for relative_path in find_markdown_files(dir_path_content)]
+    missing = [path for path in pages if os.path.exists(path) and not has_compressed(path, formats)]
+    for path in missing:
+        compress_file_chunks(path, formats)
+    outputs = find_assets(static_dir, ignore) if os.path.isdir(static_dir) else []
+    outputs.extend(generated_outputs)
+    manifest = BuildManifest.load(manifest_path)
+    key = os.path.normpath(dest_dir_path)
+    manifest.compressed[key], counts = compress_outputs(dest_dir_path, outputs, manifest.compressed.get(key), jobs=jobs)
+    manifest.save(manifest_path)
+    counts["compressed"] += len(missing)
+    counts["unchanged"] += len(pages) - len(missing)
+    print(f"Compression ({', '.join(available_formats())}): {counts['compressed']} compressed, {counts['unchanged']} unchanged, {counts['removed']} removed")
+    return counts
+
+def link_index_from_references(dir_path_content, references):
+    # references maps source paths, as passed to generate_pages, to their links and images
+    index = LinkIndex()
+    for relative_path in find_markdown_files(dir_path_content):
+        index.add_page(relative_path, relative_path.replace('.md', '.html'), references.get(os.path.join(dir_path_content, relative_path), []))
+    return index
+
+def page_metadata(dir_path_content, metadata, terms=None):
+    # metadata and terms map source paths, as passed to generate_pages, to what was collected while rendering
+    pages = {}
+    for relative_path in find_markdown_files(dir_path_content):
+        source_path = os.path.join(dir_path_content, relative_path)
+        relative_output = relative_path.replace('.md', '.html')
+        pages[relative_path] = dict(metadata.get(source_path, {}), output=relative_output)
+        if terms is not None:
+            pages[relative_path]["terms"] = terms.get(source_path, {})
+    return pages
+
+def link_index_from_manifest(manifest):
+    index = LinkIndex()
+    for relative_path, entry in manifest.pages.items():
+        index.add_page(relative_path, entry["output"], entry["references"])
+    return index
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+
+from functions import RENDERER_VERSION
+
+MANIFEST_VERSION = 7
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, template_hash=None, basepath=None, pages=None, assets=None, compressed=None, sections=None, renderer=RENDERER_VERSION):
+        self.template_hash = template_hash
+        self.basepath = basepath
+        # the RENDERER_VERSION the pages were rendered with; a page's output changes with it
+        # even when its source does not
+        self.renderer = renderer
+        # relative source path -> {"hash": ..., "output": relative output path,
+        #                          "references": [[kind, url], ...] of its links and images,
+        #                          "metadata": {"title", "summary", "words", "updated", "output"},
+        #                          "terms": {search term: occurrences}}
+        self.pages = pages if pages is not None else {}
+        # relative paths of the static files the last sync put into the output directory
+        self.assets = assets if assets is not None else []
+        # output directory -> {relative path of a static file or generated output: content hash its
+        # compressed siblings came from}; pages are compressed as they are written, so they are not listed
+        self.compressed = compressed if compressed is not None else {}
+        # relative paths of the section listing pages and feeds the last --sections build wrote
+        self.sections = sections if sections is not None else []
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != MANIFEST_VERSION:
+            return cls()
+        return cls(data.get("template"), data.get("basepath"), data.get("pages", {}), data.get("assets", []), data.get("compressed", {}), data.get("sections", []), data.get("renderer"))
+
+    def save(self, path):
+        data = {
+            "version": MANIFEST_VERSION,
+            "template": self.template_hash,
+            "basepath": self.basepath,
+            "renderer": self.renderer,
+            "pages": self.pages,
+            "assets": self.assets,
+            "compressed": self.compressed,
+            "sections": self.sections,
+        }
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def settings_match(self, template_hash, basepath):
+        return self.template_hash == template_hash and self.basepath == basepath and self.renderer == RENDERER_VERSION
+
+    def page_is_current(self, source, source_hash):
+        entry = self.pages.get(source)
+        return entry is not None and entry["hash"] == source_hash
+
+    def record_page(self, source, source_hash, output, references=(), metadata=None, terms=None):
+        self.pages[source] = {
+            "hash": source_hash,
+            "output": output,
+            "references": [list(reference) for reference in references],
+            "metadata": metadata if metadata is not None else {},
+            "terms": dict(terms) if terms is not None else {},
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, BuildManifest):
+            return NotImplemented
+        return (self.template_hash == other.template_hash and
+                self.basepath == other.basepath and
+                self.renderer == other.renderer and
+                self.pages == other.pages and
+                self.assets == other.assets and
+                self.compressed == other.compressed and
+                self.sections == other.sections)
+
+    def __repr__(self):
+        return f"BuildManifest({self.template_hash}, {self.basepath}, {len(self.pages)} pages)"
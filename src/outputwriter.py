@@ -0,0 +1,164 @@
+import os
+import queue
+import threading
+
+from compress import compress_file_chunks, has_compressed, is_compressible, remove_compressed, write_compressed
+
+
+def create_directories(paths):
+    # creates the parent directory of every path once; returns the set of directories
+    directories = {os.path.dirname(path) for path in paths}
+    for directory in directories:
+        os.makedirs(directory or ".", exist_ok=True)
+    return directories
+
+
+def make_parent_directory(path, created_dirs=None):
+    directory = os.path.dirname(path)
+    if created_dirs is None or directory not in created_dirs:
+        os.makedirs(directory or ".", exist_ok=True)
+        if created_dirs is not None:
+            created_dirs.add(directory)
+
+
+def temporary_path(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def write_if_changed(path, data, created_dirs=None):
+    # writes atomically through a temporary file; returns False without touching the file
+    # when it already holds data, so unchanged outputs keep their mtime
+    make_parent_directory(path, created_dirs)
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    tmp_path = temporary_path(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def same_contents(path, other_path, chunk_size=1 << 16):
+    try:
+        if os.path.getsize(path) != os.path.getsize(other_path):
+            return False
+        with open(path, 'rb') as f, open(other_path, 'rb') as other:
+            while True:
+                chunk = f.read(chunk_size)
+                if chunk != other.read(chunk_size):
+                    return False
+                if not chunk:
+                    return True
+    except OSError:
+        return False
+
+
+def write_file_if_changed(path, write, created_dirs=None):
+    # write_if_changed for output too large to hold as one string: write(f) writes it to a
+    # temporary text file next to path, which replaces path only when the two differ
+    make_parent_directory(path, created_dirs)
+    tmp_path = temporary_path(path)
+    try:
+        with open(tmp_path, 'w', encoding="utf-8", newline="") as f:
+            write(f)
+        if same_contents(tmp_path, path):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+class OutputWriter:
+    # writes files from a background thread, so rendering carries on while earlier pages
+    # are written; at most max_pending pages wait in memory. compress is a list of formats
+    # (see compress.available_formats): the compressed siblings of a text output are written
+    # with it, from the data just compared, whenever the output changes or a sibling is
+    # missing; without it they are removed when the output changes, so no sibling is stale
+    def __init__(self, created_dirs=(), max_pending=64, compress=None):
+        self.created_dirs = set(created_dirs)
+        self.compress = compress
+        self.pending = queue.Queue(max_pending)
+        self.written = 0
+        self.unchanged = 0
+        self.error = None
+        # the counts are kept by both the writer thread and write_file
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, path, text):
+        if self.error is not None:
+            raise self.error
+        self.pending.put((path, text))
+
+    def write_file(self, path, write):
+        # writes in the calling thread with write_file_if_changed, for a page streamed
+        # to its file rather than queued as one string
+        if self.error is not None:
+            raise self.error
+        changed = write_file_if_changed(path, write, self.created_dirs)
+        self._compress(path, changed)
+        self._count(changed)
+
+    def _compress(self, path, changed, data=None):
+        # data is None for a streamed page, whose siblings are compressed from the file
+        if not is_compressible(path):
+            return
+        if not self.compress:
+            if changed:
+                remove_compressed(path)
+        elif changed or not has_compressed(path, self.compress):
+            if data is None:
+                compress_file_chunks(path, self.compress)
+            else:
+                write_compressed(path, data, self.compress)
+
+    def _count(self, changed):
+        with self.lock:
+            if changed:
+                self.written += 1
+            else:
+                self.unchanged += 1
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue
+            path, text = item
+            try:
+                data = text.encode("utf-8")
+                changed = write_if_changed(path, data, self.created_dirs)
+                self._compress(path, changed, data)
+                self._count(changed)
+            except Exception as error:
+                self.error = error
+
+    def close(self):
+        # waits for every queued write and raises the first error the writer hit
+        if self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.pending.put(None)
+            self.thread.join()
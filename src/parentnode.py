@@ -1,18 +1,53 @@
 from htmlnode import HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, basepath=None):
+        return "".join(self.iter_html(basepath))
+
+    def iter_html(self, basepath=None):
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
+        yield f"<{self.tag}{self.props_to_html(basepath)}>"
+        for child in self.children:
+            yield from child.iter_html(basepath)
+        yield f"</{self.tag}>"
+
+    def __repr__(self):
+        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+class InlineParentNode(ParentNode):
+    # a ParentNode of TextNodes only, such as a paragraph; each child is serialized in one
+    # call rather than through a generator of its own
+    __slots__ = ()
+
+    def iter_html(self, basepath=None):
+        yield f"<{self.tag}{self.props_to_html(basepath)}>"
+        for child in self.children:
+            yield child.to_html(basepath)
+        yield f"</{self.tag}>"
+
+    def __repr__(self):
+        return f"InlineParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+class TextParentNode(InlineParentNode):
+    # an InlineParentNode whose text the block renderer found free of characters to
+    # escape; the check is made once for the block instead of once per inline node
+    __slots__ = ()
+
+    def iter_html(self, basepath=None):
+        yield f"<{self.tag}{self.props_to_html(basepath)}>"
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            yield child.plain_html(basepath)
+        yield f"</{self.tag}>"
 
     def __repr__(self):
-        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
+        return f"TextParentNode({self.tag}, children: {self.children}, {self.props})"
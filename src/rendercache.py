@@ -0,0 +1,89 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+from functions import RENDERER_VERSION
+
+class BlockCache:
+    def __init__(self, max_entries=4096, directory=None, basepath="/"):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.basepath = basepath or "/"
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, block):
+        digest = hashlib.sha256(f"{RENDERER_VERSION}\0{self.basepath}\0{block}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".html")
+
+    def get(self, block):
+        key = self.key(block)
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return html
+        if self.directory is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'r', encoding="utf-8") as f:
+                    html = f.read()
+            except OSError:
+                html = None
+            if html is not None:
+                os.utime(path)
+                self._remember(key, html)
+                self.hits += 1
+                return html
+        self.misses += 1
+        return None
+
+    def put(self, block, html):
+        key = self.key(block)
+        self._remember(key, html)
+        if self.directory is not None:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, html):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def prune_disk(self, max_entries=None):
+        # drop the least recently used fragments on disk; get() touches the files it reads
+        if self.directory is None or not os.path.isdir(self.directory):
+            return 0
+        if max_entries is None:
+            max_entries = self.max_entries
+        files = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                files.append((os.path.getmtime(path), path))
+        files.sort()
+        stale = files[:max(0, len(files) - max_entries)]
+        for _, path in stale:
+            os.remove(path)
+        return len(stale)
+
+    def add_counts(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0.0
+        print(f"Block cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)")
+
+    def __repr__(self):
+        return f"BlockCache({len(self.entries)}/{self.max_entries} entries, directory={self.directory}, basepath={self.basepath})"
@@ -0,0 +1,122 @@
+import json
+import os
+
+from functions import TERM_PATTERN
+from outputwriter import write_if_changed
+from sections import page_url
+from template import prefix_url
+
+SEARCH_DIR = "search"
+INDEX_FILE = "index.json"
+# a query term is looked up in the shard named after its first PREFIX_LENGTH characters
+PREFIX_LENGTH = 2
+
+
+def shard_prefix(term):
+    return term[:PREFIX_LENGTH]
+
+
+def load_page_urls(search_dir):
+    # the page urls of an index written earlier, by page id (None for a free id)
+    try:
+        with open(os.path.join(search_dir, INDEX_FILE), 'r') as f:
+            return [page[0] if page is not None else None for page in json.load(f)["pages"]]
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return []
+
+
+def assign_ids(urls, previous_urls):
+    # pages keep the id they had in the previous index, so a shard only changes when one
+    # of its terms does; new pages take the ids of removed ones before new ids are added
+    urls = set(urls)
+    slots = [url if url in urls else None for url in previous_urls]
+    kept = set(slots)
+    free = (page_id for page_id, url in enumerate(slots) if url is None)
+    for url in sorted(urls - kept):
+        page_id = next(free, None)
+        if page_id is None:
+            slots.append(url)
+        else:
+            slots[page_id] = url
+    while slots and slots[-1] is None:
+        slots.pop()
+    return slots
+
+
+def build_shards(pages, ids):
+    # pages maps urls to their {term: occurrences}; returns {prefix: {term: [page id,
+    # occurrences, page id, occurrences, ...]}} with page ids in ascending order
+    shards = {}
+    for page_id, url in enumerate(ids):
+        if url is None:
+            continue
+        for term, count in pages[url].items():
+            shards.setdefault(shard_prefix(term), {}).setdefault(term, []).extend((page_id, count))
+    return shards
+
+
+def dump_json(data):
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def write_search_index(pages, dest_dir_path, basepath="/"):
+    # pages maps relative source paths to {"output", "title", "terms"}; writes
+    # search/index.json with the page list and a search/<prefix>.json shard per term
+    # prefix, rewriting only the shards that changed since the last build
+    search_dir = os.path.join(dest_dir_path, SEARCH_DIR)
+    titles = {}
+    terms = {}
+    for entry in pages.values():
+        url = prefix_url(page_url(entry["output"]), basepath)
+        titles[url] = entry.get("title")
+        terms[url] = entry.get("terms") or {}
+    ids = assign_ids(terms, load_page_urls(search_dir))
+    shards = build_shards(terms, ids)
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+    for prefix, shard in shards.items():
+        if write_if_changed(os.path.join(search_dir, prefix + ".json"), dump_json(shard)):
+            counts["written"] += 1
+        else:
+            counts["unchanged"] += 1
+    for filename in os.listdir(search_dir) if os.path.isdir(search_dir) else ():
+        if filename.endswith(".json") and filename != INDEX_FILE and filename[:-len(".json")] not in shards:
+            os.remove(os.path.join(search_dir, filename))
+            counts["removed"] += 1
+    index = {
+        "prefix": PREFIX_LENGTH,
+        "pages": [[url, titles[url]] if url is not None else None for url in ids],
+        "shards": sorted(shards),
+    }
+    write_if_changed(os.path.join(search_dir, INDEX_FILE), dump_json(index))
+    return counts
+
+
+def search_outputs(dest_dir_path):
+    # the relative paths of the index and shards the last write_search_index wrote
+    try:
+        with open(os.path.join(dest_dir_path, SEARCH_DIR, INDEX_FILE), 'r') as f:
+            shards = json.load(f)["shards"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return []
+    return [f"{SEARCH_DIR}/{INDEX_FILE}"] + [f"{SEARCH_DIR}/{prefix}.json" for prefix in shards]
+
+
+def search(dest_dir_path, query):
+    # what a browser does with the index: load the shard of each query term and rank the
+    # pages holding every term by their total occurrences; returns [(url, title), ...]
+    search_dir = os.path.join(dest_dir_path, SEARCH_DIR)
+    with open(os.path.join(search_dir, INDEX_FILE), 'r') as f:
+        index = json.load(f)
+    scores = None
+    for term in TERM_PATTERN.findall(query.lower()):
+        postings = {}
+        if shard_prefix(term) in index["shards"]:
+            with open(os.path.join(search_dir, shard_prefix(term) + ".json"), 'r') as f:
+                flat = json.load(f).get(term, [])
+            postings = dict(zip(flat[::2], flat[1::2]))
+        if scores is None:
+            scores = postings
+        else:
+            scores = {page_id: scores[page_id] + count for page_id, count in postings.items() if page_id in scores}
+    ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+    return [tuple(index["pages"][page_id]) for page_id, _ in ranked]
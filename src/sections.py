@@ -0,0 +1,172 @@
+import os
+import re
+import time
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape, quoteattr
+
+from assetsync import remove_output
+from blocks import BlockType, classify_block
+from functions import MappedCodeBlock, text_to_textnodes
+from leafnode import LeafNode
+from outputwriter import write_if_changed
+from parentnode import ParentNode
+from template import prefix_url
+from textnode import TextType
+
+# line markers that are not words: heading hashes, list bullets and numbers, quote marks, code fences
+LINE_MARKER = re.compile(r"^(?:#{1,6}|[->]|\d+\.)\s+|^```\w*$", re.M)
+
+
+def count_words(block):
+    return len(LINE_MARKER.sub(" ", block).split())
+
+
+def paragraph_summary(block):
+    # the paragraph's text without markup, or None for a paragraph of nothing but links
+    # and images, such as a "< Back Home" link at the top of a post
+    text = block.replace("\n", " ")
+    try:
+        nodes = text_to_textnodes(text)
+    except ValueError:
+        return text
+    if not any(node.text_type != TextType.LINK and node.text_type != TextType.IMAGE and node.text.strip() for node in nodes):
+        return None
+    return "".join(node.text for node in nodes)
+
+
+def describe_blocks(blocks, metadata):
+    # passes the blocks through unchanged while adding their "words" and the first
+    # paragraph's text as "summary" to metadata, so describing a page costs no extra read
+    metadata.setdefault("summary", None)
+    metadata.setdefault("words", 0)
+    for block in blocks:
+        if isinstance(block, MappedCodeBlock):
+            # a large listing is not prose; its words are not counted
+            yield block
+            continue
+        metadata["words"] += count_words(block)
+        if metadata["summary"] is None and classify_block(block)[0] == BlockType.PARAGRAPH:
+            metadata["summary"] = paragraph_summary(block)
+        yield block
+
+
+def page_url(relative_output):
+    # the url a page is linked by: blog/tom/index.html is /blog/tom
+    relative_output = relative_output.replace(os.sep, "/")
+    if relative_output == "index.html":
+        return "/"
+    if relative_output.endswith("/index.html"):
+        return "/" + relative_output[:-len("/index.html")]
+    return "/" + relative_output
+
+
+def find_sections(relative_paths):
+    # a section is a directory without an index.md of its own whose pages sit directly in
+    # it, as name.md or name/index.md; returns {section directory: [relative paths]}
+    relative_paths = [relative_path.replace(os.sep, "/") for relative_path in relative_paths]
+    existing = set(relative_paths)
+    sections = {}
+    for relative_path in relative_paths:
+        parts = relative_path.split("/")
+        if parts[-1] == "index.md":
+            parts = parts[:-1]
+        if len(parts) < 2:
+            continue
+        section = "/".join(parts[:-1])
+        if section + "/index.md" not in existing:
+            sections.setdefault(section, []).append(relative_path)
+    return {section: sorted(pages) for section, pages in sorted(sections.items())}
+
+
+def section_title(section):
+    return section.split("/")[-1].replace("-", " ").replace("_", " ").title()
+
+
+def listing_output(section, number):
+    if number == 1:
+        return f"{section}/index.html"
+    return f"{section}/page/{number}/index.html"
+
+
+def listing_node(section, entries, number, page_count):
+    items = []
+    for entry in entries:
+        children = [ParentNode("h2", [LeafNode("a", entry["title"] or entry["url"], {"href": entry["url"]})])]
+        if entry["summary"]:
+            children.append(LeafNode("p", entry["summary"]))
+        children.append(LeafNode("small", f"{entry['words']} words"))
+        items.append(ParentNode("li", children))
+    children = [LeafNode("h1", section_title(section))]
+    if items:
+        children.append(ParentNode("ul", items))
+    links = []
+    if number > 1:
+        links.append(LeafNode("a", "Newer", {"href": page_url(listing_output(section, number - 1)), "rel": "prev"}))
+    if number < page_count:
+        links.append(LeafNode("a", "Older", {"href": page_url(listing_output(section, number + 1)), "rel": "next"}))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children)
+
+
+def is_absolute_url(url):
+    parts = urlsplit(url)
+    return bool(parts.scheme and parts.netloc)
+
+
+def atom_feed(section, entries, site_url, basepath="/"):
+    # Atom requires absolute ids and links, so site_url must be an absolute url
+    if not is_absolute_url(site_url):
+        raise ValueError(f"an Atom feed needs an absolute site url, not {site_url!r}")
+
+    def absolute(url):
+        return site_url.rstrip("/") + prefix_url(url, basepath)
+
+    def timestamp(seconds):
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+    updated = max((entry["updated"] for entry in entries), default=0)
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(section_title(section))}</title>",
+        f"  <id>{escape(absolute(page_url(listing_output(section, 1))))}</id>",
+        f"  <link href={quoteattr(absolute(page_url(listing_output(section, 1))))} />",
+        f"  <link rel=\"self\" href={quoteattr(absolute('/' + section + '/feed.xml'))} />",
+        f"  <updated>{timestamp(updated)}</updated>",
+    ]
+    for entry in sorted(entries, key=lambda entry: entry["updated"], reverse=True):
+        lines.append("  <entry>")
+        lines.append(f"    <title>{escape(entry['title'] or entry['url'])}</title>")
+        lines.append(f"    <id>{escape(absolute(entry['url']))}</id>")
+        lines.append(f"    <link href={quoteattr(absolute(entry['url']))} />")
+        lines.append(f"    <updated>{timestamp(entry['updated'])}</updated>")
+        if entry["summary"]:
+            lines.append(f"    <summary>{escape(entry['summary'])}</summary>")
+        lines.append("  </entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def generate_sections(pages, template, dest_dir_path, site_url, page_size=10, previous=()):
+    # pages maps relative source paths to their metadata ({"title", "summary", "words",
+    # "updated", "output"}); writes paginated listings and an Atom feed for every section,
+    # removes the previous outputs no longer produced and returns the relative paths written
+    outputs = []
+    by_path = {relative_path.replace(os.sep, "/"): entry for relative_path, entry in pages.items()}
+    for section, relative_paths in find_sections(by_path).items():
+        entries = [dict(by_path[relative_path], url=page_url(by_path[relative_path]["output"])) for relative_path in relative_paths]
+        page_count = max(1, -(-len(entries) // page_size))
+        for number in range(1, page_count + 1):
+            chunk = entries[(number - 1) * page_size:number * page_size]
+            title = section_title(section) if number == 1 else f"{section_title(section)} (page {number})"
+            content = listing_node(section, chunk, number, page_count).to_html(template.basepath)
+            output = listing_output(section, number)
+            write_if_changed(os.path.join(dest_dir_path, output), template.render(Title=title, Content=content).encode("utf-8"))
+            outputs.append(output)
+        feed = f"{section}/feed.xml"
+        write_if_changed(os.path.join(dest_dir_path, feed), atom_feed(section, entries, site_url, template.basepath).encode("utf-8"))
+        outputs.append(feed)
+    for output in set(previous).difference(outputs):
+        remove_output(dest_dir_path, output)
+    return outputs
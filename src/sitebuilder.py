@@ -0,0 +1,66 @@
+import os
+
+from functions import markdown_to_html_node
+from main import extract_title, find_markdown_files
+from rendercache import BlockCache
+from template import Template
+
+
+def directory_loader(content_dir):
+    def load(relative_path):
+        with open(os.path.join(content_dir, relative_path), 'r') as f:
+            return f.read()
+    return load
+
+
+def output_path(path):
+    return path.replace('.md', '.html')
+
+
+class SiteBuilder:
+    # renders pages in memory; the compiled template and the block cache stay warm between
+    # calls, so re-rendering a page only re-renders the blocks that changed
+    def __init__(self, template_text, sources, basepath="/", cache_size=4096):
+        # sources is a mapping of relative markdown path -> markdown, or a loader callable
+        # that takes a relative path and returns its markdown
+        self.basepath = basepath or "/"
+        self.template = Template(template_text, self.basepath)
+        self.sources = sources
+        self.cache = BlockCache(cache_size, basepath=self.basepath)
+        # lets paths() list the pages of a directory loader
+        self.content_dir = None
+
+    @classmethod
+    def from_directory(cls, content_dir, template_path, basepath="/", cache_size=4096):
+        with open(template_path, 'r') as f:
+            builder = cls(f.read(), directory_loader(content_dir), basepath, cache_size)
+        builder.content_dir = content_dir
+        return builder
+
+    def set_template(self, template_text):
+        self.template = Template(template_text, self.basepath)
+
+    def load(self, path):
+        if callable(self.sources):
+            return self.sources(path)
+        return self.sources[path]
+
+    def paths(self):
+        if callable(self.sources):
+            if self.content_dir is None:
+                raise ValueError("a loader has no list of pages; pass the paths to build")
+            return find_markdown_files(self.content_dir)
+        return sorted(path for path in self.sources if path.endswith(".md"))
+
+    def render_markdown(self, markdown, references=None):
+        content = markdown_to_html_node(markdown, self.cache, references=references).to_html(self.basepath)
+        return self.template.render(Title=extract_title(markdown), Content=content)
+
+    def render(self, path, references=None):
+        return self.render_markdown(self.load(path), references)
+
+    def build(self, paths=None):
+        # returns {relative output path: page html}
+        if paths is None:
+            paths = self.paths()
+        return {output_path(path): self.render(path) for path in paths}
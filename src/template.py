@@ -0,0 +1,70 @@
+import re
+
+from htmlescape import escape_text
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+# slots filled with plain text rather than markup, such as a page title from its heading;
+# their values are escaped when rendered
+TEXT_SLOTS = frozenset(["Title"])
+
+
+def prefix_url(url, basepath):
+    if not basepath or basepath == "/" or not url.startswith("/"):
+        return url
+    return basepath + url[1:]
+
+
+class Template:
+    def __init__(self, text, basepath="/"):
+        self.basepath = basepath or "/"
+        # segments alternates static markup and slot names: [static, slot, static, slot, ..., static]
+        self.segments = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.segments.append(self._rewrite_urls(text[position:match.start()]))
+            self.segments.append(match.group(1))
+            position = match.end()
+        self.segments.append(self._rewrite_urls(text[position:]))
+        self.slots = self.segments[1::2]
+
+    def _rewrite_urls(self, markup):
+        if self.basepath == "/":
+            return markup
+        return markup.replace('href="/', f'href="{self.basepath}').replace('src="/', f'src="{self.basepath}')
+
+    def render(self, **values):
+        parts = self.segments[:]
+        for i in range(1, len(parts), 2):
+            value = values[parts[i]]
+            parts[i] = escape_text(value) if parts[i] in TEXT_SLOTS else value
+        return "".join(parts)
+
+    def iter_render(self, **values):
+        # slot values may be strings or iterables of string chunks, e.g. node.iter_html()
+        for i, segment in enumerate(self.segments):
+            if i % 2 == 0:
+                yield segment
+                continue
+            value = values[segment]
+            if segment in TEXT_SLOTS:
+                yield escape_text(value)
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def write(self, stream, **values):
+        stream.writelines(self.iter_render(**values))
+
+    def __eq__(self, other):
+        if not isinstance(other, Template):
+            return NotImplemented
+        return self.basepath == other.basepath and self.segments == other.segments
+
+    def __repr__(self):
+        return f"Template(basepath={self.basepath}, slots={self.slots})"
+
+
+def load_template(template_path, basepath="/"):
+    with open(template_path, 'r') as template_file:
+        return Template(template_file.read(), basepath)
@@ -0,0 +1,68 @@
+import os
+
+from assetsync import find_assets, is_ignored, sync_static, DEFAULT_IGNORE
+from testsupport import TempDirTestCase, write_file
+
+class TestAssetSync(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "tom.png"), "png")
+        write_file(os.path.join(self.static, "images", "tom.png:Zone.Identifier"), "[ZoneTransfer]")
+
+    def test_is_ignored(self):
+        self.assertTrue(is_ignored(os.path.join("images", "tom.png:Zone.Identifier"), DEFAULT_IGNORE))
+        self.assertFalse(is_ignored(os.path.join("images", "tom.png"), DEFAULT_IGNORE))
+        self.assertTrue(is_ignored(os.path.join("images", "tom.png"), ["images/*"]))
+
+    def test_find_assets_skips_ignored_files(self):
+        self.assertEqual(find_assets(self.static), ["index.css", os.path.join("images", "tom.png")])
+
+    def test_first_sync_copies_everything(self):
+        assets, counts = sync_static(self.static, self.docs)
+        self.assertEqual(counts["copy"], 2)
+        self.assertEqual(len(assets), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "tom.png:Zone.Identifier")))
+
+    def test_second_sync_copies_nothing(self):
+        assets, _ = sync_static(self.static, self.docs)
+        _, counts = sync_static(self.static, self.docs, assets)
+        self.assertEqual(counts["copy"], 0)
+        self.assertEqual(counts["unchanged"], 2)
+
+    def test_changed_file_is_copied(self):
+        assets, _ = sync_static(self.static, self.docs)
+        write_file(os.path.join(self.static, "index.css"), "body { color: red; }")
+        _, counts = sync_static(self.static, self.docs, assets)
+        self.assertEqual(counts["copy"], 1)
+        with open(os.path.join(self.docs, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red; }")
+
+    def test_checksum_ignores_touched_files(self):
+        assets, _ = sync_static(self.static, self.docs)
+        os.utime(os.path.join(self.static, "index.css"), (0, 0))
+        _, counts = sync_static(self.static, self.docs, assets, checksum=True)
+        self.assertEqual(counts["unchanged"], 2)
+
+    def test_stale_file_is_removed(self):
+        assets, _ = sync_static(self.static, self.docs)
+        write_file(os.path.join(self.docs, "index.html"), "<html></html>")
+        os.remove(os.path.join(self.static, "images", "tom.png"))
+        _, counts = sync_static(self.static, self.docs, assets)
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_hardlink(self):
+        sync_static(self.static, self.docs, method="hardlink")
+        source = os.stat(os.path.join(self.static, "index.css"))
+        dest = os.stat(os.path.join(self.docs, "index.css"))
+        self.assertEqual(source.st_ino, dest.st_ino)
+
+    def test_reflink_falls_back_to_copy(self):
+        _, counts = sync_static(self.static, self.docs, method="reflink")
+        self.assertEqual(counts["copy"] + counts["reflink"], 2)
+        with open(os.path.join(self.docs, "images", "tom.png")) as f:
+            self.assertEqual(f.read(), "png")
@@ -0,0 +1,44 @@
+import os
+import random
+import tempfile
+import unittest
+
+from bench_memory import count_nodes
+from benchmark import generate_corpus, generate_markdown_page, parse_mix, run_benchmarks
+from functions import markdown_to_html_node
+
+class TestBenchmark(unittest.TestCase):
+    def test_generated_pages_render(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            markdown = generate_markdown_page(rng, blocks=30, inline_density=0.5)
+            self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div>"))
+
+    def test_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = generate_corpus(os.path.join(tmp, "a"), pages=3, seed=7)
+            second = generate_corpus(os.path.join(tmp, "b"), pages=3, seed=7)
+            for a, b in zip(first, second):
+                with open(a) as fa, open(b) as fb:
+                    self.assertEqual(fa.read(), fb.read())
+
+    def test_count_nodes_counts_inline_text_nodes(self):
+        tree = markdown_to_html_node("# Title\n\nSome **bold** text")
+        self.assertEqual(count_nodes(tree), 7)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("paragraph=3,code"), {"paragraph": 3.0, "code": 1.0})
+
+    def test_run_benchmarks_reports_every_stage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            generate_corpus(tmp, pages=2, blocks=5)
+            stages = run_benchmarks(tmp, repeat=1)
+        self.assertEqual(list(stages), [
+            "markdown_to_blocks",
+            "block_to_block_type",
+            "text_to_textnodes",
+            "block_to_html_node",
+            "to_html",
+            "generate_pages_recursive",
+        ])
+        self.assertEqual(stages["generate_pages_recursive"]["items"], 2)
@@ -1,6 +1,6 @@
 import unittest
 
-from blocks import BlockType, block_to_block_type
+from blocks import BlockType, block_to_block_type, classify_block
 
 class TestBlocks(unittest.TestCase):
     def test_block_to_block_type_paragraph(self):
@@ -25,4 +25,25 @@ class TestBlocks(unittest.TestCase):
 
     def test_block_to_block_type_ordered_list(self):
         block = "1. First item\n2. Second item"
-        self.assertEqual(block_to_block_type(block), BlockType.ORDERED_LIST)
\ No newline at end of file
+        self.assertEqual(block_to_block_type(block), BlockType.ORDERED_LIST)
+
+    def test_block_to_block_type_ordered_list_out_of_order(self):
+        block = "1. First item\n3. Third item"
+        self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
+    def test_block_to_block_type_mixed_list_is_paragraph(self):
+        self.assertEqual(block_to_block_type("- Item 1\nnot an item"), BlockType.PARAGRAPH)
+        self.assertEqual(block_to_block_type("> quoted\nnot quoted"), BlockType.PARAGRAPH)
+
+    def test_classify_block_returns_lines_for_lists_and_quotes(self):
+        self.assertEqual(classify_block("- Item 1\n- Item 2"), (BlockType.UNORDERED_LIST, ["- Item 1", "- Item 2"]))
+        self.assertEqual(classify_block("> a\n>b"), (BlockType.QUOTE, ["> a", ">b"]))
+        self.assertEqual(classify_block("1. a\n2. b"), (BlockType.ORDERED_LIST, ["1. a", "2. b"]))
+
+    def test_classify_block_skips_lines_for_headings_and_code(self):
+        self.assertEqual(classify_block("# Title"), (BlockType.HEADING, None))
+        self.assertEqual(classify_block("```\ncode\n```"), (BlockType.CODE, None))
+
+    def test_block_to_block_type_long_ordered_list(self):
+        block = "\n".join(f"{i}. item" for i in range(1, 3001))
+        self.assertEqual(block_to_block_type(block), BlockType.ORDERED_LIST)
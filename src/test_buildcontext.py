@@ -0,0 +1,30 @@
+import unittest
+from collections import Counter
+
+from buildcontext import BuildContext, PageContext
+from buildprofile import BuildProfile, PageTimer, page_record
+from rendercache import BlockCache
+
+class TestBuildContext(unittest.TestCase):
+    def test_page_context_collects_what_the_build_collects(self):
+        cache = BlockCache()
+        page = BuildContext(cache, references={}, terms={}).page_context()
+        self.assertIs(page.cache, cache)
+        self.assertEqual((page.timer, page.references, page.metadata, page.terms), (None, [], None, Counter()))
+        worker_cache = BlockCache()
+        self.assertIs(BuildContext(cache).page_context(worker_cache).cache, worker_cache)
+
+    def test_add_page_keys_by_source(self):
+        context = BuildContext(profile=BuildProfile(), references={}, metadata={})
+        timer = PageTimer()
+        context.add_page("index.md", PageContext(timer=timer, references=[("link", "/")], metadata={"title": "Home"}, terms=Counter(home=1)), page_record("index.md", timer, 0.0, 0.1))
+        self.assertEqual(context.references, {"index.md": [("link", "/")]})
+        self.assertEqual(context.metadata, {"index.md": {"title": "Home"}})
+        self.assertIsNone(context.terms)
+        self.assertEqual(len(context.profile.pages), 1)
+
+    def test_for_worker_is_empty_and_has_no_cache(self):
+        context = BuildContext(BlockCache(), BuildProfile(), {"a.md": []}, None, {"a.md": Counter()})
+        worker = context.for_worker()
+        self.assertIsNone(worker.cache)
+        self.assertEqual((worker.profile.pages, worker.references, worker.metadata, worker.terms), ([], {}, None, {}))
@@ -0,0 +1,65 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from buildprofile import BuildProfile, PageTimer, STAGES, page_record
+from functions import markdown_to_html_node
+
+class TestBuildProfile(unittest.TestCase):
+    def make_profile(self):
+        profile = BuildProfile()
+        for name, seconds in [("a.md", 0.1), ("b.md", 0.3), ("c.md", 0.2)]:
+            timer = PageTimer()
+            timer.add("inline", seconds / 2)
+            timer.add("write", seconds / 2)
+            profile.add_record(page_record(name, timer, 0.0, seconds))
+        return profile
+
+    def test_page_timer_accumulates(self):
+        timer = PageTimer()
+        timer.add("inline", 0.5)
+        timer.add("inline", 0.25)
+        self.assertEqual(timer.totals, {"inline": 0.75})
+        self.assertEqual(timer.time("tree", len, "abc"), 3)
+        self.assertIn("tree", timer.totals)
+
+    def test_markdown_to_html_node_records_stages(self):
+        timer = PageTimer()
+        node = markdown_to_html_node("# Title\n\nSome **bold** text\n\n- a\n- b", timer=timer)
+        self.assertEqual(node.to_html(), markdown_to_html_node("# Title\n\nSome **bold** text\n\n- a\n- b").to_html())
+        self.assertEqual(set(timer.totals), {"split", "classify", "inline", "tree"})
+
+    def test_slowest_pages(self):
+        profile = self.make_profile()
+        self.assertEqual([record["page"] for record in profile.slowest_pages(2)], ["b.md", "c.md"])
+
+    def test_stage_totals(self):
+        totals = self.make_profile().stage_totals()
+        self.assertEqual(list(totals), list(STAGES))
+        self.assertAlmostEqual(totals["inline"], 0.3)
+        self.assertEqual(totals["read"], 0.0)
+
+    def test_report(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.make_profile().report(top=1)
+        self.assertIn("Slowest 1 pages:", output.getvalue())
+        self.assertIn("b.md", output.getvalue())
+        self.assertNotIn("a.md", output.getvalue())
+
+    def test_exports(self):
+        profile = self.make_profile()
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "profile.json")
+            trace_path = os.path.join(tmp, "profile.trace.json")
+            profile.write_json(json_path)
+            profile.write_chrome_trace(trace_path)
+            with open(json_path) as f:
+                self.assertEqual(len(json.load(f)["pages"]), 3)
+            with open(trace_path) as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual(len([event for event in events if event["cat"] == "page"]), 3)
+        self.assertEqual(len([event for event in events if event["cat"] == "stage"]), 6)
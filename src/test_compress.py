@@ -0,0 +1,79 @@
+import gzip
+import io
+import os
+from contextlib import redirect_stdout
+
+from compress import compress_file, compress_outputs, is_compressible
+from main import compress_site
+from manifest import BuildManifest
+from testsupport import TempDirTestCase, write_file
+
+def read_gzip(path):
+    with open(path, 'rb') as f:
+        return gzip.decompress(f.read()).decode("utf-8")
+
+class TestCompress(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = os.path.join(self.tmp.name, "docs")
+        write_file(os.path.join(self.docs, "index.html"), "<html>" + "<p>hello</p>" * 50 + "</html>")
+        write_file(os.path.join(self.docs, "blog", "index.html"), "<html><p>blog</p></html>")
+        write_file(os.path.join(self.docs, "images", "tom.png"), "png")
+
+    def test_is_compressible(self):
+        self.assertTrue(is_compressible("index.html"))
+        self.assertTrue(is_compressible(os.path.join("css", "index.css")))
+        self.assertFalse(is_compressible(os.path.join("images", "tom.png")))
+
+    def test_compress_file_writes_gzip_sibling(self):
+        path = os.path.join(self.docs, "index.html")
+        content_hash, written = compress_file(path, ["gzip"])
+        self.assertTrue(written)
+        with open(path, 'r') as f:
+            self.assertEqual(read_gzip(path + ".gz"), f.read())
+        self.assertEqual(compress_file(path, ["gzip"], content_hash), (content_hash, False))
+
+    def test_compress_file_rewrites_missing_sibling(self):
+        path = os.path.join(self.docs, "index.html")
+        content_hash, _ = compress_file(path, ["gzip"])
+        os.remove(path + ".gz")
+        self.assertEqual(compress_file(path, ["gzip"], content_hash), (content_hash, True))
+
+    def test_compress_outputs_skips_unchanged_and_removes_stale(self):
+        outputs = ["index.html", os.path.join("blog", "index.html"), os.path.join("images", "tom.png")]
+        hashes, counts = compress_outputs(self.docs, outputs, formats=["gzip"])
+        self.assertEqual(sorted(hashes), sorted(outputs[:2]))
+        self.assertEqual(counts, {"compressed": 2, "unchanged": 0, "removed": 0})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", "tom.png.gz")))
+        write_file(os.path.join(self.docs, "index.html"), "<html>changed</html>")
+        os.remove(os.path.join(self.docs, "blog", "index.html"))
+        hashes, counts = compress_outputs(self.docs, outputs, hashes, formats=["gzip"])
+        self.assertEqual(counts, {"compressed": 1, "unchanged": 0, "removed": 1})
+        self.assertEqual(read_gzip(os.path.join(self.docs, "index.html.gz")), "<html>changed</html>")
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_parallel_matches_serial(self):
+        outputs = ["index.html", os.path.join("blog", "index.html")]
+        serial, _ = compress_outputs(self.docs, outputs, formats=["gzip"])
+        parallel, counts = compress_outputs(self.docs, outputs, formats=["gzip"], jobs=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(counts["unchanged"], 0)
+
+    def test_compress_site_records_hashes_in_manifest(self):
+        content = os.path.join(self.tmp.name, "content")
+        static = os.path.join(self.tmp.name, "static")
+        manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        write_file(os.path.join(content, "index.md"), "# Home")
+        write_file(os.path.join(content, "blog", "index.md"), "# Blog")
+        write_file(os.path.join(static, "images", "tom.png"), "png")
+        write_file(os.path.join(static, "index.css"), "p { margin: 0 }")
+        write_file(os.path.join(self.docs, "index.css"), "p { margin: 0 }")
+        with redirect_stdout(io.StringIO()):
+            first = compress_site(content, static, self.docs, manifest_path)
+            second = compress_site(content, static, self.docs, manifest_path)
+        self.assertEqual(first["compressed"], 3)
+        self.assertEqual(second["unchanged"], 3)
+        self.assertEqual(read_gzip(os.path.join(self.docs, "blog", "index.html.gz")), "<html><p>blog</p></html>")
+        # pages are compressed as they are written, so only static files need hashes
+        manifest = BuildManifest.load(manifest_path)
+        self.assertEqual(sorted(manifest.compressed[os.path.normpath(self.docs)]), ["index.css"])
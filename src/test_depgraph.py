@@ -0,0 +1,49 @@
+import os
+
+from depgraph import DependencyGraph, relative_within
+from testsupport import TempDirTestCase, write_file
+
+class TestDependencyGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        write_file(self.template, "{{ Title }}{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        write_file(os.path.join(self.static, "images", "tom.png"), "png")
+        self.graph = DependencyGraph(self.template, {
+            "index.md": {"hash": "a", "output": "index.html", "references": [["link", "/blog"], ["image", "/images/tom.png"]]},
+            os.path.join("blog", "index.md"): {"hash": "b", "output": os.path.join("blog", "index.html"), "references": [["link", "/"]]},
+        })
+
+    def plan(self, *paths):
+        return self.graph.plan(paths, self.content, self.static)
+
+    def test_relative_within(self):
+        self.assertEqual(relative_within(os.path.join(self.content, "index.md"), self.content), "index.md")
+        self.assertIsNone(relative_within(self.template, self.content))
+
+    def test_template_change_regenerates_every_page(self):
+        self.assertEqual(self.plan(self.template)["pages"], {"index.md", os.path.join("blog", "index.md")})
+
+    def test_page_change_regenerates_only_that_page(self):
+        plan = self.plan(os.path.join(self.content, "blog", "index.md"))
+        self.assertEqual(plan["pages"], {os.path.join("blog", "index.md")})
+        self.assertEqual(plan["assets"], set())
+
+    def test_asset_change_regenerates_no_page(self):
+        plan = self.plan(os.path.join(self.static, "images", "tom.png"), os.path.join(self.static, "images", "tom.png:Zone.Identifier"))
+        self.assertEqual(plan["pages"], set())
+        self.assertEqual(plan["assets"], {os.path.join("images", "tom.png")})
+        self.assertEqual(plan["broken"], set())
+
+    def test_removals_report_pages_left_broken(self):
+        os.remove(os.path.join(self.static, "images", "tom.png"))
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        plan = self.plan(os.path.join(self.static, "images", "tom.png"), os.path.join(self.content, "blog", "index.md"))
+        self.assertEqual(plan["removed_assets"], {os.path.join("images", "tom.png")})
+        self.assertEqual(plan["removed_pages"], {os.path.join("blog", "index.md")})
+        self.assertEqual(plan["broken"], {("index.md", "images/tom.png"), ("index.md", "blog/index.html")})
@@ -1,7 +1,47 @@
+import io
+import random
+import tracemalloc
 import unittest
+from collections import Counter
 
-from functions import split_nodes_delimiter, extract_markdown_images_with_alt_text, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, markdown_to_html_node
+from functions import split_nodes_delimiter, extract_markdown_images_with_alt_text, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, markdown_to_html_node, scan_inline, expand_text_nodes, iter_markdown_blocks, iter_blocks_html, iter_mapped_blocks, code_to_html_node, MappedCodeBlock
 from textnode import TextNode, TextType
+from leafnode import LeafNode
+from parentnode import InlineParentNode, ParentNode, TextParentNode
+from rendercache import BlockCache
+
+def chained_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    return split_nodes_link(split_nodes_image(nodes))
+
+def result_or_error(function, text):
+    try:
+        return function(text)
+    except ValueError:
+        return "ValueError"
+
+class RepeatingStream:
+    # a file-like object that produces text lazily, so the input never sits in memory
+    def __init__(self, text, repeat):
+        self.text = text
+        self.remaining = repeat
+
+    def read(self, size=-1):
+        if self.remaining == 0:
+            return ""
+        self.remaining -= 1
+        return self.text
+
+class NullStream:
+    def write(self, text):
+        return len(text)
+
+    def writelines(self, lines):
+        for line in lines:
+            pass
 
 class TestFunctions(unittest.TestCase):
 
@@ -212,3 +252,169 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_scan_inline_matches_chained_splits(self):
+        texts = [
+            "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+            "[link](/a) at the start and ![image](/b.png) at the end",
+            "**bold with _underscores_ and `ticks`** then _italic with `ticks`_",
+            "***triple*** and ****empty**** and __",
+            "![a](u)[b](v) and **!**[c](w)",
+            "unclosed **bold",
+            "_a **b** c_",
+            "[x](http://a_b_c.com)",
+            "",
+        ]
+        for text in texts:
+            self.assertEqual(result_or_error(scan_inline, text), result_or_error(chained_text_to_textnodes, text), text)
+
+    def test_scan_inline_matches_chained_splits_fuzzed(self):
+        pieces = ["a", " ", "**", "*", "_", "`", "!", "[", "]", "(", ")", "![x](u)", "[l](v)", "](", "b c"]
+        rng = random.Random(5)
+        for _ in range(3000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(result_or_error(scan_inline, text), result_or_error(chained_text_to_textnodes, text), text)
+
+    def test_markdown_to_html_node_keeps_text_nodes(self):
+        node = markdown_to_html_node("Some **bold** text")
+        self.assertEqual(node.children[0].children, [
+            TextNode("Some ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode(" text", TextType.TEXT),
+        ])
+
+    def test_expand_text_nodes(self):
+        md = "# Title\n\nSome **bold** and a [link](/blog)\n\n- one\n- _two_\n\n```\ncode\n```"
+        node = markdown_to_html_node(md)
+        expanded = expand_text_nodes(node)
+        self.assertEqual(expanded.to_html("/html/"), node.to_html("/html/"))
+        self.assertIsInstance(expanded.children[1], ParentNode)
+        self.assertIsInstance(expanded.children[1].children[0], LeafNode)
+
+    def test_iter_markdown_blocks_matches_markdown_to_blocks(self):
+        pieces = ["a", "\n", "\n\n", " ", "b\n", "\n\n\n", "# c"]
+        rng = random.Random(3)
+        for _ in range(500):
+            markdown = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            for chunk_size in (1, 2, 5, 1 << 16):
+                blocks = list(iter_markdown_blocks(io.StringIO(markdown), chunk_size))
+                self.assertEqual(blocks, markdown_to_blocks(markdown), (markdown, chunk_size))
+
+    def test_iter_markdown_blocks_large_block_is_linear(self):
+        # 16384 chunks of one block; rescanning or recopying the block per chunk takes close to a minute
+        code = "```\n" + "x = 1\n" * ((4 << 20) // 6) + "```"
+        blocks = list(iter_markdown_blocks(io.StringIO("# Dump\n\n" + code + "\n\nafter"), 256))
+        self.assertEqual(len(blocks), 3)
+        self.assertEqual(blocks[1], code)
+
+    def test_iter_blocks_html_matches_to_html(self):
+        md = "# Title\n\nSome **bold** and a [link](/blog)\n\n- one\n- _two_\n\n```\ncode\n```\n"
+        html = "".join(iter_blocks_html(iter_markdown_blocks(io.StringIO(md), 4), "/html/"))
+        self.assertEqual(html, markdown_to_html_node(md).to_html("/html/"))
+
+    def test_iter_blocks_html_memory_is_bounded(self):
+        block = "A paragraph with **bold** text and a [link](/blog/tom).\n\n" * 100
+        stream = RepeatingStream(block, 200)
+        tracemalloc.start()
+        NullStream().writelines(iter_blocks_html(iter_markdown_blocks(stream)))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(peak, 256 * 1024)
+
+    def test_iter_mapped_blocks_matches_iter_markdown_blocks(self):
+        pieces = ["# Head", "\n", "\n\n", " ", "text é", "```", "```é\n<a> & b\n```", "- item", "\u00a0", "\x1c"]
+        rng = random.Random(7)
+        for _ in range(500):
+            markdown = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            expected = markdown_to_blocks(markdown)
+            for large_block_size in (1, 8, 1 << 20):
+                blocks = list(iter_mapped_blocks(markdown.encode("utf-8"), large_block_size))
+                self.assertEqual(len(blocks), len(expected), markdown)
+                for block, text in zip(blocks, expected):
+                    if isinstance(block, MappedCodeBlock):
+                        # chunks of 3 bytes split "é" between two chunks
+                        self.assertEqual("".join(block.iter_html(chunk_size=3)), code_to_html_node(text).to_html(), markdown)
+                    else:
+                        self.assertEqual(block, text, markdown)
+
+    def test_code_is_escaped(self):
+        md = "A `<b>` tag\n\n```\nif a < b && c > d:\n```"
+        expected = "<div><p>A <code>&lt;b&gt;</code> tag</p><pre><code>if a &lt; b &amp;&amp; c &gt; d:\n</code></pre></div>"
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual("".join(iter_blocks_html(iter_mapped_blocks(md.encode("utf-8"), 8))), expected)
+
+    def test_blocks_without_special_characters_skip_escaping(self):
+        md = "# A [link](/a?b=1&c=2)\n\n- one\n- _two_\n\n> R&D\n> ![x](/x.png)\n\n1. a < b\n\n```\nplain\n```"
+        children = markdown_to_html_node(md).children
+        self.assertEqual([type(child) for child in children], [InlineParentNode, ParentNode, InlineParentNode, ParentNode, TextParentNode])
+        self.assertEqual([type(item) for item in children[1].children], [TextParentNode, TextParentNode])
+        self.assertEqual([type(item) for item in children[3].children], [InlineParentNode])
+        expected = '<div><h1>A <a href="/html/a?b=1&amp;c=2">link</a></h1><ul><li>one</li><li><i>two</i></li></ul><blockquote>R&amp;D <img src="/html/x.png" alt="x"></img></blockquote><ol><li>a &lt; b</li></ol><pre><code>plain\n</code></pre></div>'
+        self.assertEqual(markdown_to_html_node(md).to_html("/html/"), expected)
+
+    def test_mapped_code_block_memory_is_bounded(self):
+        line = "<row id=\"1\">caf\u00e9 & cr\u00e8me</row>\n"
+        source = ("# Dump\n\n```\n" + line * 40000 + "```\n").encode("utf-8")
+        tracemalloc.start()
+        NullStream().writelines(iter_blocks_html(iter_mapped_blocks(source, 1 << 16)))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertGreater(len(source), 1 << 20)
+        self.assertLess(peak, 512 * 1024)
+
+    def test_markdown_to_html_node_collects_references(self):
+        md = "# See [home](/)\n\nAn ![elf](/images/elf.png) and `[not](/a/link)`\n\n- [one](/one)\n\n```\n[code](/code)\n```"
+        expected = [("link", "/"), ("image", "/images/elf.png"), ("link", "/one")]
+        references = []
+        markdown_to_html_node(md, references=references)
+        self.assertEqual(references, expected)
+        cache = BlockCache()
+        for _ in range(2):
+            references = []
+            markdown_to_html_node(md, cache, references=references)
+            self.assertEqual(references, expected)
+        references = []
+        "".join(iter_blocks_html(iter_markdown_blocks(io.StringIO(md)), references=references))
+        self.assertEqual(references, expected)
+
+    def test_cached_blocks_give_the_references_of_their_markdown(self):
+        md = "# See [home](/) and **[bold](/b)**\n\nAn ![elf](/elf.png)[next](/n) and `[not](/a)`\nover [two\nlines](/two)\n\n- [one](/one)\n- _[it](/i)_ ![x](/x.png)\n\n1. [o1](/o1)\n2. ![o2](/o2.png)\n\n> [q](/q)\n> ![q2](/q2.png)"
+        expected = []
+        markdown_to_html_node(md, references=expected)
+        self.assertEqual(len(expected), 10)
+        cache = BlockCache()
+        markdown_to_html_node(md, cache)
+        references = []
+        markdown_to_html_node(md, cache, references=references)
+        self.assertEqual(cache.hits, 5)
+        self.assertEqual(references, expected)
+
+    def test_markdown_to_html_node_collects_terms(self):
+        md = "# The *Ring* Verse\n\n[< Back Home](/) ![an elf](/elf.png)\n\n- one **ring** to rule\n\n```\nring = 1\n```"
+        expected = Counter({"ring": 3, "the": 1, "verse": 1, "back": 1, "home": 1, "one": 1, "to": 1, "rule": 1})
+        terms = Counter()
+        markdown_to_html_node(md, terms=terms)
+        self.assertEqual(terms, expected)
+        cache = BlockCache()
+        for _ in range(2):
+            terms = Counter()
+            markdown_to_html_node(md, cache, terms=terms)
+            self.assertEqual(terms, expected)
+        terms = Counter()
+        "".join(iter_blocks_html(iter_markdown_blocks(io.StringIO(md)), terms=terms))
+        self.assertEqual(terms, expected)
+
+    def test_split_links_repeated_and_adjacent(self):
+        node = TextNode("[a](/x)[a](/x) and [a](/x)", TextType.TEXT)
+        self.assertListEqual(
+            [
+                TextNode("", TextType.TEXT),
+                TextNode("a", TextType.LINK, "/x"),
+                TextNode("", TextType.TEXT),
+                TextNode("a", TextType.LINK, "/x"),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("a", TextType.LINK, "/x"),
+            ],
+            split_nodes_link([node]),
+        )
+        with self.assertRaises(TypeError):
+            split_nodes_image([LeafNode("b", "bold")])
@@ -1,4 +1,5 @@
 import unittest
+import htmlnode
 from htmlnode import HTMLNode
 
 class TestHTMLNode(unittest.TestCase):
@@ -12,4 +13,22 @@ class TestHTMLNode(unittest.TestCase):
 
     def test_props_to_html_empty(self):
         node = HTMLNode(props={})
-        self.assertEqual(node.props_to_html(), "")
\ No newline at end of file
+        self.assertEqual(node.props_to_html(), "")
+
+    def test_props_to_html_escapes(self):
+        node = HTMLNode(props={"href": '/a?b=1&c="2"', "title": "<Tom & Goldberry>"})
+        self.assertEqual(node.props_to_html("/html/"), ' href="/html/a?b=1&amp;c=&quot;2&quot;" title="&lt;Tom &amp; Goldberry&gt;"')
+
+    def test_url_attributes_are_cached_per_basepath(self):
+        htmlnode._escaped_urls.clear()
+        node = HTMLNode(props={"href": "/blog/tom", "src": "/images/tom.png", "alt": "Tom"})
+        for _ in range(3):
+            self.assertEqual(node.props_to_html(), ' href="/blog/tom" src="/images/tom.png" alt="Tom"')
+            self.assertEqual(node.props_to_html("/html/"), ' href="/html/blog/tom" src="/html/images/tom.png" alt="Tom"')
+        self.assertEqual({basepath: sorted(urls) for basepath, urls in htmlnode._escaped_urls.items()}, {None: ["/blog/tom", "/images/tom.png"], "/html/": ["/blog/tom", "/images/tom.png"]})
+
+    def test_url_attribute_cache_is_bounded(self):
+        htmlnode._escaped_urls.clear()
+        for i in range(htmlnode.URL_CACHE_SIZE + 10):
+            self.assertEqual(HTMLNode(props={"href": f"/p{i}"}).props_to_html("/x/"), f' href="/x/p{i}"')
+        self.assertLessEqual(len(htmlnode._escaped_urls["/x/"]), htmlnode.URL_CACHE_SIZE)
@@ -14,6 +14,11 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("div", "Content", {"class": "container"})
         self.assertEqual(node.to_html(), '<div class="container">Content</div>')
 
+    def test_to_html_escapes_value(self):
+        node = LeafNode("p", 'if a < b && "c" > d')
+        self.assertEqual(node.to_html(), '<p>if a &lt; b &amp;&amp; "c" &gt; d</p>')
+        self.assertEqual(LeafNode(None, "<br>").to_html(), "&lt;br&gt;")
+
     def test_to_html_without_value(self):
         node = LeafNode("span", None)
         with self.assertRaises(ValueError):
@@ -0,0 +1,40 @@
+import os
+import unittest
+
+from linkindex import LinkIndex, find_output, reference_target
+
+class TestLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = LinkIndex()
+        self.index.add_page("index.md", "index.html", [("link", "/blog/tom"), ("image", "/images/tom.png"), ("link", "https://example.com")])
+        self.index.add_page(os.path.join("blog", "tom", "index.md"), os.path.join("blog", "tom", "index.html"), [("link", "/"), ("link", "../missing"), ("image", "/images/gone.png")])
+        self.outputs = ["index.html", os.path.join("blog", "tom", "index.html"), os.path.join("images", "tom.png")]
+
+    def test_reference_target(self):
+        self.assertEqual(reference_target("/images/tom.png", "index.html"), "images/tom.png")
+        self.assertEqual(reference_target("/", "blog/tom/index.html"), "")
+        self.assertEqual(reference_target("../majesty#top", "blog/tom/index.html"), "blog/majesty")
+        self.assertEqual(reference_target("/blog/my%20post/?page=2", "index.html"), "blog/my post")
+        self.assertIsNone(reference_target("https://example.com/", "index.html"))
+        self.assertIsNone(reference_target("mailto:tom@example.com", "index.html"))
+        self.assertIsNone(reference_target("#top", "index.html"))
+
+    def test_find_output(self):
+        outputs = {"index.html", "blog/tom/index.html", "about.html"}
+        self.assertEqual(find_output("", outputs), "index.html")
+        self.assertEqual(find_output("blog/tom", outputs), "blog/tom/index.html")
+        self.assertEqual(find_output("about", outputs), "about.html")
+        self.assertIsNone(find_output("blog/majesty", outputs))
+
+    def test_broken_references(self):
+        self.assertEqual(self.index.broken_references(self.outputs), [
+            ("blog/tom/index.md", "link", "../missing"),
+            ("blog/tom/index.md", "image", "/images/gone.png"),
+        ])
+
+    def test_pages_referencing(self):
+        self.assertEqual(self.index.pages_referencing("/images/tom.png"), ["index.md"])
+        self.assertEqual(self.index.pages_referencing("/blog/tom/"), ["index.md"])
+        self.assertEqual(self.index.pages_referencing("blog/tom/index.html"), ["index.md"])
+        self.assertEqual(self.index.pages_referencing("/"), ["blog/tom/index.md"])
+        self.assertEqual(self.index.pages_referencing("/nowhere"), [])
@@ -0,0 +1,353 @@
+import gzip
+import io
+import os
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from assetsync import DEFAULT_IGNORE, find_assets
+from buildcontext import BuildContext
+from buildprofile import STAGES, BuildProfile
+from functions import RENDERER_VERSION
+from main import URL_MARKER, main, generate_changed, generate_pages_incremental, generate_pages_recursive, generate_pages_targets, find_markdown_files, init_file_copy, link_index_from_manifest, link_index_from_references, parse_args, extract_title, extract_title_from_file
+from manifest import BuildManifest
+from rendercache import BlockCache
+from testsupport import TEMPLATE, TempDirTestCase, write_file
+
+class TestIncrementalBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "manifest.json")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nA post")
+
+    def build(self, basepath="/"):
+        with redirect_stdout(io.StringIO()):
+            return generate_pages_incremental(self.content, self.template, self.docs, self.manifest, basepath=basepath)
+
+    def test_find_markdown_files(self):
+        self.assertEqual(find_markdown_files(self.content), [os.path.join("blog", "post", "index.md"), "index.md"])
+
+    def test_first_build_generates_everything(self):
+        generated, removed = self.build()
+        self.assertEqual(sorted(generated), [os.path.join("blog", "post", "index.md"), "index.md"])
+        self.assertEqual(removed, [])
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "post", "index.html")))
+
+    def test_unchanged_build_generates_nothing(self):
+        self.build()
+        generated, removed = self.build()
+        self.assertEqual(generated, [])
+        self.assertEqual(removed, [])
+
+    def test_only_changed_page_is_regenerated(self):
+        self.build()
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome back")
+        generated, _ = self.build()
+        self.assertEqual(generated, ["index.md"])
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn("Welcome back", f.read())
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.docs, "index.html"))
+        generated, _ = self.build()
+        self.assertEqual(generated, ["index.md"])
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        write_file(self.template, TEMPLATE.replace("<body>", "<body class=\"x\">"))
+        generated, _ = self.build()
+        self.assertEqual(len(generated), 2)
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        generated, _ = self.build(basepath="/html/")
+        self.assertEqual(len(generated), 2)
+        with open(os.path.join(self.docs, "index.html")) as f:
+            self.assertIn('href="/html/index.css"', f.read())
+
+    def test_title_is_escaped(self):
+        write_file(os.path.join(self.content, "index.md"), '# Q&A <draft> "x"\n\nWelcome')
+        self.build()
+        with open(os.path.join(self.docs, "index.html")) as f:
+            html = f.read()
+        self.assertIn('<title>Q&amp;A &lt;draft&gt; "x"</title>', html)
+        self.assertIn('<h1>Q&amp;A &lt;draft&gt; "x"</h1>', html)
+
+    def test_full_build_invalidates_the_manifest(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            outputs = []
+            for argv in (["--incremental"], ["/html/"], ["--incremental"], ["/html/"], ["--changed", "content/index.md"]):
+                with redirect_stdout(io.StringIO()) as stdout:
+                    main(argv + ["-q"])
+                outputs.append(stdout.getvalue())
+        finally:
+            os.chdir(cwd)
+        self.assertIn("Incremental build: 2 generated, 0 removed, 0 unchanged", outputs[2])
+        self.assertIn("Incremental build: 2 generated, 0 removed, 0 unchanged", outputs[4])
+        with open(os.path.join(self.docs, "blog", "post", "index.html")) as f:
+            self.assertIn('href="/index.css"', f.read())
+
+    def test_compressed_siblings_follow_their_pages(self):
+        page = os.path.join(self.docs, "index.html")
+        post = os.path.join(self.docs, "blog", "post", "index.html")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_incremental(self.content, self.template, self.docs, self.manifest, compress=["gzip"])
+            write_file(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+            generate_pages_incremental(self.content, self.template, self.docs, self.manifest, compress=["gzip"])
+        with open(page, 'rb') as f, open(page + ".gz", 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), f.read())
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nChanged again")
+        self.build()
+        self.assertFalse(os.path.exists(page + ".gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_full_build_ignores_static_paths_like_sync(self):
+        static = os.path.join(self.tmp.name, "static")
+        for relative_path in ("logo.png", os.path.join("images", "tom.png"), os.path.join("images", "notes.txt")):
+            write_file(os.path.join(static, relative_path), "x")
+        ignore = DEFAULT_IGNORE + ["images/*.png"]
+        init_file_copy(static, self.docs, ignore)
+        copied = sorted(os.path.relpath(os.path.join(dirpath, name), self.docs) for dirpath, _, names in os.walk(self.docs) for name in names)
+        self.assertEqual(copied, sorted(find_assets(static, ignore)))
+        self.assertEqual(copied, [os.path.join("images", "notes.txt"), "logo.png"])
+
+    def test_renderer_change_rebuilds_everything(self):
+        self.build()
+        manifest = BuildManifest.load(self.manifest)
+        manifest.renderer -= 1
+        manifest.save(self.manifest)
+        generated, _ = self.build()
+        self.assertEqual(len(generated), 2)
+        self.assertEqual(BuildManifest.load(self.manifest).renderer, RENDERER_VERSION)
+        manifest.save(self.manifest)
+        with redirect_stdout(io.StringIO()):
+            generated, _ = generate_changed([], self.content, os.path.join(self.tmp.name, "static"), self.template, self.docs, self.manifest)
+        self.assertEqual(len(generated), 2)
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        generated, removed = self.build()
+        self.assertEqual(generated, [])
+        self.assertEqual(removed, [os.path.join("blog", "post", "index.md")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_manifest_keeps_references_of_skipped_pages(self):
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nRead the [post](/blog/post) or [this](/gone)")
+        self.build()
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n![tom](/images/tom.png)")
+        generated, _ = self.build()
+        self.assertEqual(generated, [os.path.join("blog", "post", "index.md")])
+        index = link_index_from_manifest(BuildManifest.load(self.manifest))
+        self.assertEqual(index.pages_referencing("/blog/post"), ["index.md"])
+        self.assertEqual(index.broken_references(["index.html", os.path.join("blog", "post", "index.html")]), [
+            ("blog/post/index.md", "image", "/images/tom.png"),
+            ("index.md", "link", "/gone"),
+        ])
+
+
+    def test_changed_regenerates_only_dependent_outputs(self):
+        static = os.path.join(self.tmp.name, "static")
+        write_file(os.path.join(static, "images", "tom.png"), "png")
+        self.build()
+        index_mtime = os.stat(os.path.join(self.docs, "index.html")).st_mtime_ns
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nEdited")
+        write_file(os.path.join(self.content, "new.md"), "# New")
+        with redirect_stdout(io.StringIO()):
+            generated, removed = generate_changed([os.path.join(self.content, "blog", "post", "index.md"), os.path.join(self.content, "new.md"), os.path.join(static, "images", "tom.png")],
+                                                  self.content, static, self.template, self.docs, self.manifest)
+        self.assertEqual(generated, [os.path.join("blog", "post", "index.md"), "new.md"])
+        self.assertEqual(removed, [])
+        self.assertEqual(os.stat(os.path.join(self.docs, "index.html")).st_mtime_ns, index_mtime)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "images", "tom.png")))
+        with open(os.path.join(self.docs, "blog", "post", "index.html")) as f:
+            self.assertIn("Edited", f.read())
+        generated, _ = self.build()
+        self.assertEqual(generated, [])
+
+    def test_changed_honors_jobs_and_profile(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            with redirect_stdout(io.StringIO()):
+                main(["--incremental", "-q"])
+            write_file(os.path.join("content", "index.md"), "# Home\n\nEdited")
+            write_file(os.path.join("content", "new.md"), "# New")
+            with redirect_stdout(io.StringIO()) as stdout:
+                main(["--changed", os.path.join("content", "index.md"), os.path.join("content", "new.md"), "--jobs", "2", "--profile", "-q"])
+        finally:
+            os.chdir(cwd)
+        self.assertIn("Generated 2 pages", stdout.getvalue())
+        self.assertIn("with 2 workers", stdout.getvalue())
+        self.assertIn("Profiled 2 pages", stdout.getvalue())
+
+    def test_changed_template_regenerates_every_page(self):
+        self.build()
+        write_file(self.template, TEMPLATE.replace("<body>", "<body class=\"x\">"))
+        with redirect_stdout(io.StringIO()):
+            generated, _ = generate_changed([], self.content, os.path.join(self.tmp.name, "static"), self.template, self.docs, self.manifest)
+        self.assertEqual(len(generated), 2)
+        generated, _ = self.build()
+        self.assertEqual(generated, [])
+
+
+class TestParallelBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        write_file(self.template, TEMPLATE)
+        for i in range(6):
+            write_file(os.path.join(self.content, f"section{i % 2}", f"page{i}", "index.md"), f"# Page {i}\n\nSome **bold** text and a [link](/page{i}).")
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, serial, basepath="/html/")
+            stats = generate_pages_recursive(self.content, self.template, parallel, basepath="/html/", jobs=2)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+        self.assertEqual(sum(pages for pages, _ in stats.values()), 6)
+
+    def test_parallel_collects_references(self):
+        serial, parallel = {}, {}
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "serial"), context=BuildContext(references=serial))
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "parallel"), jobs=2, context=BuildContext(references=parallel))
+        self.assertEqual(serial, parallel)
+        index = link_index_from_references(self.content, parallel)
+        self.assertEqual(index.pages_referencing("/page3"), [os.path.join("section1", "page3", "index.md")])
+
+    def test_parse_args_jobs(self):
+        self.assertEqual(parse_args(["/html/", "--jobs", "4"]).jobs, 4)
+        self.assertEqual(parse_args([]).jobs, 1)
+        self.assertEqual(parse_args([]).basepath, "/")
+        self.assertEqual(parse_args(["-j", "0"]).jobs, os.cpu_count() or 1)
+
+    def test_targets_match_separate_builds(self):
+        targets = [("/", os.path.join(self.tmp.name, "root")), ("/html/", os.path.join(self.tmp.name, "html"))]
+        write_file(os.path.join(self.content, "marker.md"), f"# Marker\n\nA stray {URL_MARKER} next to a [link](/page1).")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_targets(self.content, self.template, targets)
+            for basepath, dest_dir in targets:
+                generate_pages_recursive(self.content, self.template, dest_dir + "-single", basepath=basepath)
+        for _, dest_dir in targets:
+            self.assertEqual(self.read_tree(dest_dir), self.read_tree(dest_dir + "-single"))
+
+    def test_targets_with_cache_and_jobs(self):
+        targets = [("/", os.path.join(self.tmp.name, "root")), ("/cdn/", os.path.join(self.tmp.name, "cdn"))]
+        with redirect_stdout(io.StringIO()):
+            generate_pages_targets(self.content, self.template, targets, jobs=2, context=BuildContext(BlockCache(basepath=URL_MARKER)))
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "single"), basepath="/cdn/")
+        self.assertEqual(self.read_tree(os.path.join(self.tmp.name, "cdn")), self.read_tree(os.path.join(self.tmp.name, "single")))
+
+    def test_large_code_block_is_streamed_from_the_source(self):
+        listing = "if a < b && c > d: caf\u00e9\n" * 50000
+        write_file(os.path.join(self.content, "dump.md"), f"# Dump\n\nSee [page 1](/page1).\n\n```\n{listing}```\n\nThe end.")
+        references, metadata = {}, {}
+        targets = [("/html/", os.path.join(self.tmp.name, "targets"))]
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "mapped"), basepath="/html/", context=BuildContext(references=references, metadata=metadata))
+            generate_pages_targets(self.content, self.template, targets)
+        self.assertEqual(self.read_tree(os.path.join(self.tmp.name, "mapped")), self.read_tree(targets[0][1]))
+        dump = os.path.join(self.content, "dump.md")
+        self.assertEqual(references[dump], [("link", "/page1")])
+        self.assertEqual((metadata[dump]["summary"], metadata[dump]["words"]), ("See page 1.", 6))
+
+    def test_large_sources_are_written_only_when_changed(self):
+        write_file(os.path.join(self.content, "large.md"), "# Large\n\n" + "Some words. " * (1 << 17))
+        write_file(os.path.join(self.content, "dump.md"), "# Dump\n\n```\n" + "x < y\n" * (1 << 18) + "```")
+        docs = os.path.join(self.tmp.name, "docs")
+        outputs = [os.path.join(docs, "large.html"), os.path.join(docs, "dump.html")]
+        for jobs, expected in ((1, "(8 written, 0 unchanged)"), (1, "(0 written, 8 unchanged)"), (2, "(0 written, 8 unchanged)")):
+            with redirect_stdout(io.StringIO()) as stdout:
+                generate_pages_recursive(self.content, self.template, docs, jobs=jobs, verbose=False)
+            self.assertIn(expected, stdout.getvalue())
+            for path in outputs:
+                os.utime(path, ns=(0, 0))
+        self.assertEqual([os.stat(path).st_mtime_ns for path in outputs], [0, 0])
+        self.assertEqual([name for name in os.listdir(docs) if name.endswith(".tmp")], [])
+        with open(outputs[1]) as f:
+            self.assertIn("x &lt; y\n" * 3, f.read())
+
+    def test_large_sources_are_streamed_through_the_writer(self):
+        # neither source is mapped: one has no large code block, the other "\r\n" line endings
+        paragraph = "Some words " * 64
+        write_file(os.path.join(self.content, "large.md"), "# Large\n\n" + (paragraph + "\n\n") * 2048)
+        with open(os.path.join(self.content, "crlf.md"), 'w', newline="") as f:
+            f.write("# Crlf\r\n\r\n" + (paragraph + "\r\n\r\n") * 2048)
+        docs = os.path.join(self.tmp.name, "docs")
+        for _ in range(2):
+            tracemalloc.start()
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, docs)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.assertLess(peak, 1 << 20)
+        with open(os.path.join(docs, "crlf.html")) as f:
+            self.assertEqual(f.read().count("<p>Some"), 2048)
+
+    def test_profiled_output_matches_unprofiled(self):
+        write_file(os.path.join(self.content, "dump.md"), "# Dump\n\n```\n" + "x < y\n" * (1 << 18) + "```")
+        profile = BuildProfile()
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "plain"), basepath="/html/")
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, "profiled"), basepath="/html/", context=BuildContext(profile=profile))
+        self.assertEqual(self.read_tree(os.path.join(self.tmp.name, "plain")), self.read_tree(os.path.join(self.tmp.name, "profiled")))
+        self.assertEqual(len(profile.pages), 7)
+        stages = set().union(*(record["stages"] for record in profile.pages))
+        self.assertEqual(stages, set(STAGES))
+        for record in profile.pages:
+            self.assertLessEqual(sum(record["stages"].values()), record["seconds"])
+
+    def test_parse_args_rejects_negative_cache_size(self):
+        self.assertEqual(parse_args(["--cache", "--cache-size", "0"]).cache_size, 0)
+        with redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                parse_args(["--cache", "--cache-size", "-1"])
+
+    def test_parse_args_targets(self):
+        args = parse_args(["--target", "/html/=./docs", "--target", "=./staging"])
+        self.assertEqual(args.target, [("/html/", "./docs"), ("/", "./staging")])
+        with redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                parse_args(["--target", "/html/"])
+            with self.assertRaises(SystemExit):
+                parse_args(["--target", "/=./docs", "--incremental"])
+
+class TestExtractTitle(unittest.TestCase):
+    def test_extract_title_from_file_matches_extract_title(self):
+        markdowns = ["# Home\n\nText", "Intro\n\n## Sub\n\n# Title  \n", "No heading", "a\x0c# Hidden\nb"]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            for markdown in markdowns:
+                write_file(path, markdown)
+                self.assertEqual(extract_title_from_file(path), extract_title(markdown), markdown)
+
+    def test_extract_title_stops_at_first_heading(self):
+        markdowns = {"# Home\n\nText\n\n# Other": "Home", "Intro\r\n\r\n# Title  \r\n": "Title", "No heading": None, "a\x0c# Hidden\nb": "Hidden"}
+        for markdown, title in markdowns.items():
+            self.assertEqual(extract_title(markdown), title, markdown)
+            self.assertEqual(extract_title(markdown), next((line[2:].strip() for line in markdown.splitlines() if line.startswith("# ")), None))
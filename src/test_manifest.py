@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from functions import RENDERER_VERSION
+from manifest import BuildManifest, hash_bytes, hash_file
+
+class TestManifest(unittest.TestCase):
+    def test_hash_file_matches_hash_bytes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'wb') as f:
+                f.write(b"# Title\n\nSome text")
+            self.assertEqual(hash_file(path), hash_bytes(b"# Title\n\nSome text"))
+
+    def test_load_missing_manifest_is_empty(self):
+        manifest = BuildManifest.load("/nonexistent/manifest.json")
+        self.assertEqual(manifest, BuildManifest())
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.json")
+            manifest = BuildManifest("abc", "/html/", sections=["blog/index.html", "blog/feed.xml"])
+            manifest.record_page("index.md", "123", "index.html")
+            manifest.save(path)
+            self.assertEqual(BuildManifest.load(path), manifest)
+
+    def test_load_corrupt_manifest_is_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.json")
+            with open(path, 'w') as f:
+                f.write("{not json")
+            self.assertEqual(BuildManifest.load(path), BuildManifest())
+
+    def test_settings_match(self):
+        manifest = BuildManifest("abc", "/")
+        self.assertTrue(manifest.settings_match("abc", "/"))
+        self.assertFalse(manifest.settings_match("abc", "/html/"))
+        self.assertFalse(manifest.settings_match("def", "/"))
+        self.assertFalse(BuildManifest("abc", "/", renderer=RENDERER_VERSION - 1).settings_match("abc", "/"))
+
+    def test_page_is_current(self):
+        manifest = BuildManifest("abc", "/")
+        manifest.record_page("index.md", "123", "index.html")
+        self.assertTrue(manifest.page_is_current("index.md", "123"))
+        self.assertFalse(manifest.page_is_current("index.md", "456"))
+        self.assertFalse(manifest.page_is_current("other.md", "123"))
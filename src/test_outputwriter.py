@@ -0,0 +1,84 @@
+import gzip
+import os
+
+from outputwriter import OutputWriter, create_directories, write_file_if_changed, write_if_changed
+from testsupport import TempDirTestCase
+
+class TestOutputWriter(TempDirTestCase):
+    def read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def test_create_directories(self):
+        paths = [os.path.join(self.tmp.name, "a", "b", "index.html"), os.path.join(self.tmp.name, "a", "b", "other.html")]
+        self.assertEqual(create_directories(paths), {os.path.join(self.tmp.name, "a", "b")})
+        self.assertTrue(os.path.isdir(os.path.join(self.tmp.name, "a", "b")))
+
+    def test_write_if_changed_skips_identical_bytes(self):
+        path = os.path.join(self.tmp.name, "blog", "index.html")
+        self.assertTrue(write_if_changed(path, b"<p>one</p>"))
+        os.utime(path, ns=(0, 0))
+        self.assertFalse(write_if_changed(path, b"<p>one</p>"))
+        self.assertEqual(os.stat(path).st_mtime_ns, 0)
+        self.assertTrue(write_if_changed(path, b"<p>two</p>"))
+        self.assertEqual(self.read(path), "<p>two</p>")
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+
+    def test_writer_writes_in_background(self):
+        paths = [os.path.join(self.tmp.name, f"section{i % 3}", f"page{i}.html") for i in range(50)]
+        with OutputWriter(max_pending=4) as writer:
+            for i, path in enumerate(paths):
+                writer.write(path, f"<p>page {i} ü</p>")
+        self.assertEqual((writer.written, writer.unchanged), (50, 0))
+        self.assertEqual(self.read(paths[7]), "<p>page 7 ü</p>")
+        with OutputWriter(create_directories(paths)) as writer:
+            for i, path in enumerate(paths):
+                writer.write(path, f"<p>page {i} ü</p>" if i else "<p>changed</p>")
+        self.assertEqual((writer.written, writer.unchanged), (1, 49))
+
+    def test_writer_raises_write_errors_on_close(self):
+        blocker = os.path.join(self.tmp.name, "file")
+        with open(blocker, 'w') as f:
+            f.write("not a directory")
+        writer = OutputWriter()
+        writer.write(os.path.join(blocker, "index.html"), "<p>x</p>")
+        with self.assertRaises(OSError):
+            writer.close()
+
+    def test_write_file_if_changed_streams_and_skips_identical_files(self):
+        path = os.path.join(self.tmp.name, "blog", "index.html")
+        write = lambda f: f.writelines(["<p>", "caf\u00e9", "</p>"])
+        self.assertTrue(write_file_if_changed(path, write))
+        os.utime(path, ns=(0, 0))
+        self.assertFalse(write_file_if_changed(path, write))
+        self.assertEqual(os.stat(path).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+        with OutputWriter() as writer:
+            writer.write_file(path, lambda f: f.write("<p>two</p>"))
+            writer.write_file(path, lambda f: f.write("<p>two</p>"))
+        self.assertEqual((writer.written, writer.unchanged), (1, 1))
+        self.assertEqual(self.read(path), "<p>two</p>")
+
+    def test_writer_compresses_changed_outputs(self):
+        path = os.path.join(self.tmp.name, "index.html")
+        streamed = os.path.join(self.tmp.name, "large.html")
+        with OutputWriter(compress=["gzip"]) as writer:
+            writer.write(path, "<p>one</p>")
+            writer.write_file(streamed, lambda f: f.write("<p>large</p>" * 1000))
+            writer.write(os.path.join(self.tmp.name, "tom.png"), "png")
+        with open(path + ".gz", 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), b"<p>one</p>")
+        with open(streamed + ".gz", 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), b"<p>large</p>" * 1000)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "tom.png.gz")))
+        os.remove(streamed + ".gz")
+        with OutputWriter(compress=["gzip"]) as writer:
+            writer.write_file(streamed, lambda f: f.write("<p>large</p>" * 1000))
+        self.assertEqual((writer.written, writer.unchanged), (0, 1))
+        self.assertTrue(os.path.exists(streamed + ".gz"))
+        # a build without compression leaves no sibling of an older version behind
+        with OutputWriter() as writer:
+            writer.write(path, "<p>one</p>")
+            writer.write_file(streamed, lambda f: f.write("<p>two</p>"))
+        self.assertTrue(os.path.exists(path + ".gz"))
+        self.assertFalse(os.path.exists(streamed + ".gz"))
@@ -1,3 +1,4 @@
+import io
 import unittest
 from parentnode import ParentNode
 from leafnode import LeafNode
@@ -38,4 +39,40 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(
             parent_node.to_html(),
             '<div class="container"><span><a href="www.example.com">grandchild</a></span></div>'
-        )
\ No newline at end of file
+        )
+
+    def test_to_html_with_basepath(self):
+        link = LeafNode("a", "link", {"href": "/blog/tom"})
+        external = LeafNode("a", "external", {"href": "https://example.com"})
+        image = LeafNode("img", "", {"src": "/images/tom.png", "alt": "Tom"})
+        parent_node = ParentNode("p", [link, external, image])
+        self.assertEqual(
+            parent_node.to_html("/html/"),
+            '<p><a href="/html/blog/tom">link</a><a href="https://example.com">external</a><img src="/html/images/tom.png" alt="Tom"></img></p>'
+        )
+
+
+    def test_iter_html_chunks(self):
+        parent_node = ParentNode("div", [ParentNode("span", [LeafNode("b", "bold")]), LeafNode(None, "text")])
+        self.assertEqual(
+            list(parent_node.iter_html()),
+            ["<div>", "<span>", "<b>bold</b>", "</span>", "text", "</div>"],
+        )
+
+    def test_write_html_matches_to_html(self):
+        items = [ParentNode("li", [LeafNode(None, f"item {i}")]) for i in range(1000)]
+        parent_node = ParentNode("ul", items, {"class": "archive"})
+        stream = io.StringIO()
+        parent_node.write_html(stream)
+        self.assertEqual(stream.getvalue(), parent_node.to_html())
+
+    def test_iter_html_without_children(self):
+        parent = ParentNode("div", None)
+        with self.assertRaises(ValueError):
+            list(parent.iter_html())
+
+
+    def test_slots(self):
+        parent_node = ParentNode("div", [LeafNode("b", "bold")])
+        self.assertFalse(hasattr(parent_node, "__dict__"))
+        self.assertFalse(hasattr(parent_node.children[0], "__dict__"))
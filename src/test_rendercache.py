@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from functions import markdown_to_html_node
+from rendercache import BlockCache
+
+MARKDOWN = "# Title\n\nA shared **disclaimer** with a [link](/legal)\n\n- one\n- two"
+
+class TestBlockCache(unittest.TestCase):
+    def test_miss_then_hit(self):
+        cache = BlockCache()
+        self.assertIsNone(cache.get("block"))
+        cache.put("block", "<p>block</p>")
+        self.assertEqual(cache.get("block"), "<p>block</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+
+    def test_key_depends_on_basepath(self):
+        self.assertNotEqual(BlockCache(basepath="/").key("block"), BlockCache(basepath="/html/").key("block"))
+
+    def test_disk_cache_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            BlockCache(directory=tmp).put("block", "<p>block</p>")
+            cache = BlockCache(directory=tmp)
+            self.assertEqual(cache.get("block"), "<p>block</p>")
+            self.assertEqual(cache.hits, 1)
+
+    def test_prune_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = BlockCache(directory=tmp)
+            for i in range(5):
+                cache.put(f"block {i}", f"<p>{i}</p>")
+            self.assertEqual(cache.prune_disk(2), 3)
+            self.assertEqual(sum(len(files) for _, _, files in os.walk(tmp)), 2)
+
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache(basepath="/html/")
+        expected = markdown_to_html_node(MARKDOWN).to_html("/html/")
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html("/html/"), expected)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html("/html/"), expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_cached_fragment_rejects_other_basepath(self):
+        cache = BlockCache(basepath="/html/")
+        node = markdown_to_html_node(MARKDOWN, cache)
+        with self.assertRaises(ValueError):
+            node.to_html("/")
@@ -0,0 +1,115 @@
+import gzip
+import io
+import json
+import os
+from contextlib import redirect_stdout
+
+from buildcontext import BuildContext
+from main import generate_pages_incremental, generate_pages_recursive, main, page_metadata
+from manifest import BuildManifest
+from searchindex import assign_ids, build_shards, search, write_search_index
+from testsupport import TempDirTestCase, write_file
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.docs = os.path.join(self.tmp.name, "docs")
+        self.template_path = os.path.join(self.tmp.name, "template.html")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        write_file(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to the [ring](/blog/ring) site.")
+        write_file(os.path.join(self.content, "blog", "ring", "index.md"), "# The Ring\n\nOne **ring** to rule them all, one ring to find them.")
+        write_file(os.path.join(self.content, "blog", "tom", "index.md"), "# Tom\n\nOld Tom Bombadil is a merry fellow.")
+
+    def build_incremental(self):
+        with redirect_stdout(io.StringIO()):
+            generate_pages_incremental(self.content, self.template_path, self.docs, self.manifest_path)
+        pages = {path: dict(entry["metadata"], terms=entry["terms"]) for path, entry in BuildManifest.load(self.manifest_path).pages.items()}
+        return write_search_index(pages, self.docs)
+
+    def shard_mtimes(self):
+        search_dir = os.path.join(self.docs, "search")
+        return {name: os.stat(os.path.join(search_dir, name)).st_mtime_ns for name in os.listdir(search_dir)}
+
+    def test_assign_ids_keeps_previous_ids(self):
+        self.assertEqual(assign_ids(["/b", "/a"], []), ["/a", "/b"])
+        self.assertEqual(assign_ids(["/a", "/c", "/d"], ["/a", "/b", "/c"]), ["/a", "/d", "/c"])
+        self.assertEqual(assign_ids(["/a"], ["/a", "/b", "/c"]), ["/a"])
+
+    def test_build_shards_groups_terms_by_prefix(self):
+        shards = build_shards({"/a": {"ring": 2, "rule": 1}, "/b": {"ring": 1, "tom": 1}}, ["/a", None, "/b"])
+        self.assertEqual(shards, {"ri": {"ring": [0, 2, 2, 1]}, "ru": {"rule": [0, 1]}, "to": {"tom": [2, 1]}})
+
+    def test_full_build_writes_searchable_shards(self):
+        metadata = {}
+        terms = {}
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template_path, self.docs, basepath="/html/", context=BuildContext(metadata=metadata, terms=terms))
+        counts = write_search_index(page_metadata(self.content, metadata, terms), self.docs, "/html/")
+        self.assertEqual(counts["unchanged"], 0)
+        with open(os.path.join(self.docs, "search", "index.json")) as f:
+            index = json.load(f)
+        self.assertEqual(index["pages"][0], ["/html/", "Home"])
+        self.assertEqual(counts["written"], len(index["shards"]))
+        self.assertEqual(search(self.docs, "ring"), [("/html/blog/ring", "The Ring"), ("/html/", "Home")])
+        self.assertEqual(search(self.docs, "Ring RULE"), [("/html/blog/ring", "The Ring")])
+        self.assertEqual(search(self.docs, "bombadil ring"), [])
+        self.assertEqual(search(self.docs, "a"), [])
+
+    def test_incremental_build_rewrites_only_changed_shards(self):
+        self.build_incremental()
+        before = self.shard_mtimes()
+        counts = self.build_incremental()
+        self.assertEqual(counts["written"], 0)
+        self.assertEqual(self.shard_mtimes(), before)
+        write_file(os.path.join(self.content, "blog", "tom", "index.md"), "# Tom\n\nOld Tom Bombadil is a jolly fellow.")
+        counts = self.build_incremental()
+        self.assertEqual((counts["written"], counts["removed"]), (1, 1))
+        after = self.shard_mtimes()
+        self.assertNotIn("me.json", after)
+        self.assertEqual(sorted(name for name in after if after[name] != before.get(name)), ["index.json", "jo.json"])
+        self.assertEqual(search(self.docs, "jolly"), [("/blog/tom", "Tom")])
+        self.assertEqual(search(self.docs, "merry"), [])
+
+    def test_removed_page_frees_its_id(self):
+        self.build_incremental()
+        os.remove(os.path.join(self.content, "blog", "ring", "index.md"))
+        self.build_incremental()
+        with open(os.path.join(self.docs, "search", "index.json")) as f:
+            self.assertEqual(json.load(f)["pages"], [["/", "Home"], None, ["/blog/tom", "Tom"]])
+        self.assertEqual(search(self.docs, "ring"), [("/", "Home")])
+        write_file(os.path.join(self.content, "new.md"), "# New\n\nA new ring.")
+        self.build_incremental()
+        self.assertEqual(search(self.docs, "ring"), [("/", "Home"), ("/new.html", "New")])
+
+    def test_search_flag_with_cache_and_workers(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            with redirect_stdout(io.StringIO()):
+                main(["--search", "--cache", "--jobs", "2", "-q"])
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(search(self.docs, "fellow"), [("/blog/tom", "Tom")])
+
+    def test_compress_covers_the_shards(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            with redirect_stdout(io.StringIO()):
+                main(["--search", "--compress", "-q"])
+                before = set(os.listdir(os.path.join(self.docs, "search")))
+                os.remove(os.path.join(self.content, "blog", "tom", "index.md"))
+                main(["--incremental", "--search", "--compress", "-q"])
+        finally:
+            os.chdir(cwd)
+        search_dir = os.path.join(self.docs, "search")
+        names = sorted(os.listdir(search_dir))
+        shards = [name for name in names if name.endswith(".json")]
+        # the shards of Tom's terms went with the page, and so did their siblings
+        self.assertTrue(before.difference(names))
+        self.assertEqual(names, sorted(shards + [name + ".gz" for name in shards]))
+        for name in shards:
+            with open(os.path.join(search_dir, name), 'rb') as f, open(os.path.join(search_dir, name + ".gz"), 'rb') as compressed:
+                self.assertEqual(gzip.decompress(compressed.read()), f.read())
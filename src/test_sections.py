@@ -0,0 +1,139 @@
+import gzip
+import io
+import os
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from buildcontext import BuildContext
+from functions import markdown_to_blocks
+from main import generate_pages_incremental, generate_pages_recursive, main, page_metadata, parse_args
+from manifest import BuildManifest
+from sections import atom_feed, count_words, describe_blocks, find_sections, generate_sections, page_url
+from template import Template
+from testsupport import TempDirTestCase, write_file
+
+class TestSections(unittest.TestCase):
+    def test_count_words_skips_block_markers(self):
+        self.assertEqual(count_words("## A heading"), 2)
+        self.assertEqual(count_words("- one item\n- two"), 3)
+        self.assertEqual(count_words("1. first\n2. second"), 2)
+        self.assertEqual(count_words("```python\nprint(x)\n```"), 1)
+        self.assertEqual(count_words("It cost 5. Then more."), 5)
+
+    def test_describe_blocks_passes_blocks_through(self):
+        markdown = "# Title\n\n[< Back](/) ![x](/x.png)\n\n> a quote\n\nThe **first** paragraph\nwraps.\n\nSecond paragraph"
+        metadata = {}
+        self.assertEqual(list(describe_blocks(markdown_to_blocks(markdown), metadata)), markdown_to_blocks(markdown))
+        self.assertEqual(metadata, {"summary": "The first paragraph wraps.", "words": 12})
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.html"), "/")
+        self.assertEqual(page_url(os.path.join("blog", "tom", "index.html")), "/blog/tom")
+        self.assertEqual(page_url("about.html"), "/about.html")
+
+    def test_find_sections(self):
+        paths = ["index.md", "blog/tom/index.md", "blog/majesty/index.md", "notes/a.md", "contact/index.md", "docs/index.md", "docs/setup.md"]
+        self.assertEqual(find_sections(paths), {"blog": ["blog/majesty/index.md", "blog/tom/index.md"], "notes": ["notes/a.md"]})
+
+    def test_atom_feed_escapes_and_orders_entries(self):
+        entries = [
+            {"title": "Old & busted", "url": "/blog/old", "summary": "<b>", "words": 1, "updated": 0},
+            {"title": "New", "url": "/blog/new", "summary": None, "words": 1, "updated": 86400},
+        ]
+        feed = atom_feed("blog", entries, "https://example.com", "/html/")
+        self.assertIn("<title>Old &amp; busted</title>", feed)
+        self.assertIn("<summary>&lt;b&gt;</summary>", feed)
+        self.assertIn('<link href="https://example.com/html/blog/new" />', feed)
+        self.assertIn("<updated>1970-01-02T00:00:00Z</updated>", feed)
+        self.assertLess(feed.index("/blog/new"), feed.index("/blog/old"))
+        with self.assertRaises(ValueError):
+            atom_feed("blog", entries, "/html/")
+
+    def test_sections_need_an_absolute_site_url(self):
+        with redirect_stderr(io.StringIO()):
+            for argv in (["--sections"], ["--sections", "--site-url", "example.com"]):
+                with self.assertRaises(SystemExit):
+                    parse_args(argv)
+        self.assertEqual(parse_args(["--sections", "--site-url", "https://example.com"]).site_url, "https://example.com")
+
+class TestSectionBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.docs = os.path.join(root, "docs")
+        self.template_path = os.path.join(root, "template.html")
+        write_file(self.template_path, "<title>{{ Title }}</title>{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        for i in range(3):
+            write_file(os.path.join(self.content, "blog", f"post{i}", "index.md"), f"# Post {i}\n\nAbout post {i}.")
+
+    def run_main(self, argv):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            with redirect_stdout(io.StringIO()) as stdout:
+                status = main(argv)
+        finally:
+            os.chdir(cwd)
+        return status, stdout.getvalue()
+
+    def read(self, *parts):
+        with open(os.path.join(self.docs, *parts)) as f:
+            return f.read()
+
+    def test_full_build_writes_paginated_listings_and_feed(self):
+        metadata = {}
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template_path, self.docs, basepath="/html/", context=BuildContext(metadata=metadata))
+        pages = page_metadata(self.content, metadata)
+        self.assertEqual(pages["index.md"]["title"], "Home")
+        outputs = generate_sections(pages, Template("<title>{{ Title }}</title>{{ Content }}", "/html/"), self.docs, "https://example.com", page_size=2)
+        self.assertEqual(outputs, ["blog/index.html", "blog/page/2/index.html", "blog/feed.xml"])
+        first = self.read("blog", "index.html")
+        self.assertIn('<h2><a href="/html/blog/post0">Post 0</a></h2><p>About post 0.</p><small>5 words</small>', first)
+        self.assertIn('<a href="/html/blog/page/2" rel="next">Older</a>', first)
+        self.assertNotIn("post2", first)
+        second = self.read("blog", "page", "2", "index.html")
+        self.assertIn("<title>Blog (page 2)</title>", second)
+        self.assertIn('<a href="/html/blog" rel="prev">Newer</a>', second)
+        self.assertEqual(self.read("blog", "feed.xml").count("<entry>"), 3)
+
+    def test_incremental_build_keeps_metadata_in_manifest(self):
+        manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_incremental(self.content, self.template_path, self.docs, manifest_path)
+            write_file(os.path.join(self.content, "blog", "post1", "index.md"), "# Renamed\n\nNew text here.")
+            generate_pages_incremental(self.content, self.template_path, self.docs, manifest_path)
+        pages = {path: entry["metadata"] for path, entry in BuildManifest.load(manifest_path).pages.items()}
+        self.assertEqual(pages[os.path.join("blog", "post0", "index.md")]["summary"], "About post 0.")
+        self.assertEqual(pages[os.path.join("blog", "post1", "index.md")]["title"], "Renamed")
+        generate_sections(pages, Template("{{ Title }}{{ Content }}"), self.docs, "https://example.com")
+        self.assertIn('<a href="/blog/post1">Renamed</a>', self.read("blog", "index.html"))
+
+    def test_incremental_build_removes_listings_no_longer_produced(self):
+        self.run_main(["--incremental", "--sections", "--site-url", "https://example.com", "--section-page-size", "1", "-q"])
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "page", "3", "index.html")))
+        os.remove(os.path.join(self.content, "blog", "post1", "index.md"))
+        os.remove(os.path.join(self.content, "blog", "post2", "index.md"))
+        _, output = self.run_main(["--incremental", "--sections", "--site-url", "https://example.com", "--section-page-size", "1", "-q"])
+        self.assertIn("Sections: 2 listing pages and feeds written, 2 removed", output)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "page")))
+        self.assertEqual(self.read("blog", "feed.xml").count("<entry>"), 1)
+
+    def test_compress_covers_listings_and_feeds(self):
+        self.run_main(["--sections", "--site-url", "https://example.com", "--section-page-size", "2", "--compress", "-q"])
+        for parts in (("blog", "index.html"), ("blog", "page", "2", "index.html"), ("blog", "feed.xml")):
+            with open(os.path.join(self.docs, *parts) + ".gz", 'rb') as f:
+                self.assertEqual(gzip.decompress(f.read()).decode("utf-8"), self.read(*parts))
+        os.remove(os.path.join(self.content, "blog", "post2", "index.md"))
+        self.run_main(["--incremental", "--sections", "--site-url", "https://example.com", "--section-page-size", "2", "--compress", "-q"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "page")))
+        with open(os.path.join(self.docs, "blog", "feed.xml.gz"), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()).decode("utf-8"), self.read("blog", "feed.xml"))
+
+    def test_check_links_knows_generated_outputs(self):
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nSee the [blog](/blog), its [feed](/blog/feed.xml) and [search](/search/index.json).")
+        status, output = self.run_main(["--sections", "--site-url", "https://example.com", "--search", "--check-links", "-q"])
+        self.assertIsNone(status)
+        self.assertIn("0 broken", output)
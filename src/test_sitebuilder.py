@@ -0,0 +1,56 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from main import generate_pages_recursive
+from sitebuilder import SiteBuilder
+from testsupport import TEMPLATE
+
+SOURCES = {
+    "index.md": "# Home\n\nWelcome, see the [post](/blog/post)",
+    "blog/post/index.md": "# Post\n\n![tom](/images/tom.png)\n\n- one\n- two",
+    "notes.txt": "not a page",
+}
+
+class TestSiteBuilder(unittest.TestCase):
+    def test_build_from_mapping(self):
+        builder = SiteBuilder(TEMPLATE, SOURCES, "/html/")
+        pages = builder.build()
+        self.assertEqual(sorted(pages), ["blog/post/index.html", "index.html"])
+        self.assertEqual(pages["index.html"], '<html><title>Home</title><link href="/html/index.css"><body><div><h1>Home</h1><p>Welcome, see the <a href="/html/blog/post">post</a></p></div></body></html>')
+
+    def test_render_matches_file_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for path, markdown in SOURCES.items():
+                os.makedirs(os.path.dirname(os.path.join(tmp, "content", path)), exist_ok=True)
+                with open(os.path.join(tmp, "content", path), 'w') as f:
+                    f.write(markdown)
+            template_path = os.path.join(tmp, "template.html")
+            with open(template_path, 'w') as f:
+                f.write(TEMPLATE)
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(os.path.join(tmp, "content"), template_path, os.path.join(tmp, "docs"), basepath="/html/")
+            builder = SiteBuilder.from_directory(os.path.join(tmp, "content"), template_path, "/html/")
+            for output, html in builder.build().items():
+                with open(os.path.join(tmp, "docs", output)) as f:
+                    self.assertEqual(html, f.read())
+
+    def test_cache_stays_warm_between_calls(self):
+        sources = dict(SOURCES)
+        builder = SiteBuilder(TEMPLATE, sources)
+        builder.render("index.md")
+        sources["index.md"] += "\n\nA new paragraph"
+        self.assertIn("<p>A new paragraph</p>", builder.render("index.md"))
+        self.assertEqual(builder.cache.hits, 2)
+
+    def test_loader_and_template_swap(self):
+        builder = SiteBuilder(TEMPLATE, SOURCES.get)
+        with self.assertRaises(ValueError):
+            builder.build()
+        builder.set_template("{{ Title }}|{{ Content }}")
+        self.assertEqual(builder.build(["index.md"]), {"index.html": 'Home|<div><h1>Home</h1><p>Welcome, see the <a href="/blog/post">post</a></p></div>'})
+        references = []
+        builder.render("blog/post/index.md", references)
+        self.assertEqual(references, [("image", "/images/tom.png")])
@@ -0,0 +1,49 @@
+import io
+import unittest
+
+from template import Template, prefix_url
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css" /><img src="/logo.png" /><body>{{ Content }}</body></html>'
+
+class TestTemplate(unittest.TestCase):
+    def test_prefix_url(self):
+        self.assertEqual(prefix_url("/blog/tom", "/html/"), "/html/blog/tom")
+        self.assertEqual(prefix_url("https://example.com", "/html/"), "https://example.com")
+        self.assertEqual(prefix_url("/blog/tom", "/"), "/blog/tom")
+
+    def test_slots(self):
+        template = Template(TEMPLATE)
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render_matches_replace(self):
+        template = Template(TEMPLATE)
+        expected = TEMPLATE.replace("{{ Title }}", "Home").replace("{{ Content }}", "<p>Hi</p>")
+        self.assertEqual(template.render(Title="Home", Content="<p>Hi</p>"), expected)
+
+    def test_basepath_rewrites_template_markup(self):
+        template = Template(TEMPLATE, "/html/")
+        html = template.render(Title="Home", Content="<p>Hi</p>")
+        self.assertIn('href="/html/index.css"', html)
+        self.assertIn('src="/html/logo.png"', html)
+
+    def test_basepath_does_not_touch_content(self):
+        template = Template(TEMPLATE, "/html/")
+        html = template.render(Title="Home", Content='<code>href="/raw"</code>')
+        self.assertIn('<code>href="/raw"</code>', html)
+
+    def test_title_is_escaped(self):
+        template = Template(TEMPLATE)
+        html = template.render(Title='Q&A <draft> "x"', Content="<p>Hi</p>")
+        self.assertIn('<title>Q&amp;A &lt;draft&gt; "x"</title>', html)
+        self.assertEqual("".join(template.iter_render(Title='Q&A <draft> "x"', Content=iter(["<p>Hi</p>"]))), html)
+
+    def test_missing_slot_value(self):
+        template = Template(TEMPLATE)
+        with self.assertRaises(KeyError):
+            template.render(Title="Home")
+
+    def test_write_streams_chunked_values(self):
+        template = Template(TEMPLATE, "/html/")
+        stream = io.StringIO()
+        template.write(stream, Title="Home", Content=iter(["<p>", "Hi", "</p>"]))
+        self.assertEqual(stream.getvalue(), template.render(Title="Home", Content="<p>Hi</p>"))
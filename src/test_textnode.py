@@ -24,6 +24,12 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.LINK)
         self.assertNotEqual(node, node2)
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = "not allowed"
+
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
         html_node = TextNode.text_node_to_html_node(node)
@@ -71,6 +77,36 @@ class TestTextNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             TextNode.text_node_to_html_node(node)
 
+    def test_to_html_matches_leaf_node(self):
+        nodes = [
+            TextNode("plain", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode("italic", TextType.ITALIC),
+            TextNode("code", TextType.CODE),
+            TextNode("link", TextType.LINK, "/blog/tom"),
+            TextNode("image", TextType.IMAGE, "/images/tom.png"),
+            TextNode("<b> & </b>", TextType.TEXT),
+            TextNode("a < b", TextType.BOLD),
+            TextNode("x && y", TextType.CODE),
+            TextNode("<Q&A>", TextType.LINK, '/search?q="tom"&page=2'),
+            TextNode('the "one" ring', TextType.IMAGE, "/images/ring<1>.png"),
+        ]
+        for node in nodes:
+            leaf = TextNode.text_node_to_html_node(node)
+            self.assertEqual(node.to_html(), leaf.to_html())
+            self.assertEqual(node.to_html("/html/"), leaf.to_html("/html/"))
+
+    def test_to_html_escapes(self):
+        node = TextNode("<Q&A>", TextType.LINK, '/search?q="tom"&page=2')
+        self.assertEqual(node.to_html("/html/"), '<a href="/html/search?q=&quot;tom&quot;&amp;page=2">&lt;Q&amp;A&gt;</a>')
+        node = TextNode('the "one" ring', TextType.IMAGE, "/images/ring.png")
+        self.assertEqual(node.to_html(), '<img src="/images/ring.png" alt="the &quot;one&quot; ring"></img>')
+
+    def test_to_html_link_without_url(self):
+        node = TextNode("This is a link without URL", TextType.LINK)
+        with self.assertRaises(ValueError):
+            node.to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
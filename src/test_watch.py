@@ -0,0 +1,84 @@
+import io
+import os
+import time
+from contextlib import redirect_stdout
+
+from testsupport import TEMPLATE, TempDirTestCase, write_file
+from watch import DevBuild, SourceWatcher, inject_livereload, LIVERELOAD_SCRIPT
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+class TestWatch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.docs = os.path.join(root, "docs")
+        self.template = os.path.join(root, "template.html")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        write_file(os.path.join(self.content, "blog", "index.md"), "# Blog\n\nPosts")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        self.build = DevBuild(self.content, self.static, self.template, self.docs)
+        with redirect_stdout(io.StringIO()):
+            self.build.build_all()
+
+    def apply(self, changed):
+        with redirect_stdout(io.StringIO()):
+            return self.build.apply_changes(changed)
+
+    def test_watcher_reports_changed_added_and_removed_files(self):
+        watcher = SourceWatcher(self.build.watched_paths())
+        self.assertEqual(watcher.poll(), set())
+        index = os.path.join(self.content, "index.md")
+        write_file(index, "# Home\n\nWelcome back, with more text")
+        os.utime(index, ns=(time.time_ns(), time.time_ns() + 10**9))
+        added = os.path.join(self.static, "new.css")
+        write_file(added, "p {}")
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.assertEqual(watcher.poll(), {index, added, os.path.join(self.content, "blog", "index.md")})
+        self.assertEqual(watcher.poll(), set())
+
+    def test_changed_page_is_regenerated(self):
+        path = os.path.join(self.content, "index.md")
+        write_file(path, "# Home\n\nEdited")
+        outputs = self.apply({path})
+        self.assertEqual(outputs, [os.path.join(self.docs, "index.html")])
+        self.assertIn("Edited", read_file(os.path.join(self.docs, "index.html")))
+
+    def test_broken_page_is_reported_and_skipped(self):
+        broken = os.path.join(self.content, "index.md")
+        write_file(broken, "# Home\n\nHalf **typed")
+        edited = os.path.join(self.content, "blog", "index.md")
+        write_file(edited, "# Blog\n\nEdited")
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            outputs = self.build.apply_changes({broken, edited})
+        self.assertEqual(outputs, [os.path.join(self.docs, "blog", "index.html")])
+        self.assertIn(f"Error building {broken}", stdout.getvalue())
+        self.assertNotIn("Half", read_file(os.path.join(self.docs, "index.html")))
+
+    def test_deleted_page_is_removed(self):
+        path = os.path.join(self.content, "blog", "index.md")
+        os.remove(path)
+        self.apply({path})
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_static_file_is_copied(self):
+        path = os.path.join(self.static, "images", "logo.png")
+        write_file(path, "png")
+        self.apply({path})
+        self.assertEqual(read_file(os.path.join(self.docs, "images", "logo.png")), "png")
+
+    def test_template_change_regenerates_all_pages(self):
+        write_file(self.template, TEMPLATE.replace("<body>", "<body><nav>menu</nav>"))
+        outputs = self.apply({self.template})
+        self.assertEqual(len(outputs), 2)
+        self.assertIn("<nav>menu</nav>", read_file(os.path.join(self.docs, "blog", "index.html")))
+
+    def test_inject_livereload(self):
+        html = inject_livereload(b"<html><body><p>Hi</p></body></html>")
+        self.assertEqual(html, b"<html><body><p>Hi</p>" + LIVERELOAD_SCRIPT.encode("utf-8") + b"</body></html>")
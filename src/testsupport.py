@@ -0,0 +1,18 @@
+import os
+import tempfile
+import unittest
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css"><body>{{ Content }}</body></html>'
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class TempDirTestCase(unittest.TestCase):
+    # each test gets a fresh self.tmp, removed again when the test finishes
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
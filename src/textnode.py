@@ -1,4 +1,6 @@
 from enum import Enum
+from htmlescape import escape_attribute, escape_text
+from htmlnode import escape_url
 from leafnode import LeafNode
 
 class TextType(Enum):
@@ -9,7 +11,15 @@ class TextType(Enum):
     LINK = "link"
     IMAGE = "image"
 
+INLINE_TAGS = {
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str = None):
         self.text = text
         self.text_type = text_type
@@ -38,6 +48,40 @@ class TextNode:
             case _:
                 raise ValueError(f"Unknown text type: {text_node.text_type}")
 
+    def to_html(self, basepath=None):
+        # same output as text_node_to_html_node(self).to_html(basepath), without the LeafNode;
+        # the check for characters to escape is inlined, as most text has none
+        text_type = self.text_type
+        text = self.text
+        if text_type is TextType.IMAGE:
+            if self.url:
+                return f'<img src="{escape_url(self.url, basepath)}" alt="{escape_attribute(text)}"></img>'
+        elif "&" in text or "<" in text or ">" in text:
+            text = escape_text(text)
+        if text_type is TextType.TEXT:
+            return text
+        tag = INLINE_TAGS.get(text_type)
+        if tag is not None:
+            return f"<{tag}>{text}</{tag}>"
+        if text_type is TextType.LINK and self.url:
+            return f'<a href="{escape_url(self.url, basepath)}">{text}</a>'
+        return TextNode.text_node_to_html_node(self).to_html(basepath)
+
+    def plain_html(self, basepath=None):
+        # to_html for text known to hold no "&", "<" or ">"; urls and alt text are still escaped
+        text_type = self.text_type
+        if text_type is TextType.TEXT:
+            return self.text
+        tag = INLINE_TAGS.get(text_type)
+        if tag is not None:
+            return f"<{tag}>{self.text}</{tag}>"
+        if text_type is TextType.LINK and self.url:
+            return f'<a href="{escape_url(self.url, basepath)}">{self.text}</a>'
+        return self.to_html(basepath)
+
+    def iter_html(self, basepath=None):
+        yield self.to_html(basepath)
+
     def __eq__(self, other):
         if not isinstance(other, TextNode):
             return NotImplemented
@@ -0,0 +1,236 @@
+import argparse
+import os
+import shutil
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from assetsync import DEFAULT_IGNORE, is_ignored
+from buildcontext import BuildContext, PageContext
+from main import MANIFEST_PATH, forget_rebuilt_outputs, init_file_copy, generate_page, generate_pages_recursive, remove_output
+from rendercache import BlockCache
+from template import load_template
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVERELOAD_PATH}").onmessage = function () {{ location.reload(); }};</script>'
+)
+
+
+class SourceWatcher:
+    def __init__(self, paths):
+        self.paths = paths
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isdir(path):
+                self._scan_directory(path, snapshot)
+            elif os.path.exists(path):
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _scan_directory(self, path, snapshot):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    self._scan_directory(entry.path, snapshot)
+                else:
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+    def poll(self):
+        snapshot = self.scan()
+        changed = {path for path, signature in snapshot.items() if self.snapshot.get(path) != signature}
+        changed.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changed
+
+
+class DevBuild:
+    # keeps the compiled template and rendered blocks in memory between rebuilds
+    def __init__(self, content_dir, static_dir, template_path, dest_dir, basepath="/", manifest_path=None):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.basepath = basepath
+        # the manifest of incremental builds, which must not trust outputs build_all replaced
+        self.manifest_path = manifest_path
+        self.template = load_template(template_path, basepath)
+        self.cache = BlockCache(basepath=basepath)
+
+    def watched_paths(self):
+        return [self.content_dir, self.static_dir, self.template_path]
+
+    def build_all(self):
+        if self.manifest_path is not None:
+            forget_rebuilt_outputs(self.manifest_path, [self.dest_dir], self.dest_dir)
+        init_file_copy(self.static_dir, self.dest_dir)
+        generate_pages_recursive(self.content_dir, self.template_path, self.dest_dir, basepath=self.basepath, context=BuildContext(self.cache))
+
+    def apply_changes(self, changed_paths):
+        # returns the output paths that were rewritten or removed
+        # a path that fails to build (half-typed markdown, a file an editor is still
+        # renaming into place) is reported and skipped, keeping its last good output
+        if self.template_path in changed_paths:
+            try:
+                self.template = load_template(self.template_path, self.basepath)
+            except (OSError, ValueError) as e:
+                print(f"Error loading template {self.template_path}: {e}")
+            else:
+                changed_paths = set(changed_paths) | self._all_markdown_files()
+        outputs = []
+        for path in sorted(changed_paths):
+            try:
+                if _is_within(path, self.content_dir) and path.endswith(".md"):
+                    relative_output = os.path.relpath(path, self.content_dir).replace(".md", ".html")
+                    outputs.append(self._update_page(path, relative_output))
+                elif _is_within(path, self.static_dir) and not is_ignored(os.path.relpath(path, self.static_dir), DEFAULT_IGNORE):
+                    outputs.append(self._update_static_file(path))
+            except (OSError, ValueError) as e:
+                print(f"Error building {path}: {e}")
+        return outputs
+
+    def _all_markdown_files(self):
+        paths = set()
+        for dirpath, _, filenames in os.walk(self.content_dir):
+            for filename in filenames:
+                if filename.endswith(".md"):
+                    paths.add(os.path.join(dirpath, filename))
+        return paths
+
+    def _update_page(self, source_path, relative_output):
+        dest_path = os.path.join(self.dest_dir, relative_output)
+        if os.path.exists(source_path):
+            generate_page(source_path, self.template_path, dest_path, template=self.template, page=PageContext(self.cache))
+        else:
+            remove_output(self.dest_dir, relative_output)
+        return dest_path
+
+    def _update_static_file(self, source_path):
+        relative_path = os.path.relpath(source_path, self.static_dir)
+        dest_path = os.path.join(self.dest_dir, relative_path)
+        if os.path.exists(source_path):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy2(source_path, dest_path)
+        else:
+            remove_output(self.dest_dir, relative_path)
+        return dest_path
+
+
+class ReloadNotifier:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, seen_version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != seen_version, timeout)
+            return self.version
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, notifier=None, **kwargs):
+        self.notifier = notifier
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url_path = urlsplit(self.path).path
+        if url_path == LIVERELOAD_PATH:
+            self.send_events()
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and url_path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, 'rb') as f:
+            body = inject_livereload(f.read())
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        seen_version = self.notifier.version
+        try:
+            while True:
+                version = self.notifier.wait(seen_version, timeout=15)
+                if version == seen_version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    seen_version = version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def inject_livereload(html_bytes):
+    script = LIVERELOAD_SCRIPT.encode("utf-8")
+    index = html_bytes.rfind(b"</body>")
+    if index == -1:
+        return html_bytes + script
+    return html_bytes[:index] + script + html_bytes[index:]
+
+
+def _is_within(path, directory):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory)
+
+
+def parse_watch_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py watch", description="Rebuild the site on changes and serve it with live reload")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix the site is served under")
+    parser.add_argument("--port", type=int, default=8888, help="port for the development server (default 8888)")
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between checks for changed files (default 0.05)")
+    return parser.parse_args(argv)
+
+
+def watch_main(argv=None):
+    args = parse_watch_args(argv)
+    build = DevBuild("./content", "./static", "./template.html", "./docs", args.basepath or "/", MANIFEST_PATH)
+    build.build_all()
+    watcher = SourceWatcher(build.watched_paths())
+    notifier = ReloadNotifier()
+    handler = partial(LiveReloadHandler, directory=build.dest_dir, notifier=notifier)
+    server = ThreadingHTTPServer(("", args.port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving {build.dest_dir} at http://localhost:{args.port}/ with live reload, watching for changes")
+    try:
+        while True:
+            time.sleep(args.interval)
+            changed = watcher.poll()
+            if not changed:
+                continue
+            start = time.perf_counter()
+            outputs = build.apply_changes(changed)
+            notifier.notify()
+            print(f"Rebuilt {len(outputs)} outputs in {(time.perf_counter() - start) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()